@@ -0,0 +1,223 @@
+# analytics.py
+"""Column-oriented session analytics for long-range reports.
+
+Sessions are kept as parallel columns sorted by start: start/end as int64
+epoch seconds and the session type as a uint8 code. A date range is two
+searchsorted() calls and per-day / per-week / per-hour totals are bincount()s.
+NumPy is optional (`pip install numpy`); without it the same API runs on
+plain lists with bisect.
+"""
+import bisect, collections, datetime as dt
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import shared
+
+KIND_CODES = {"FOCUS": 0, "SHORT": 1, "LONG": 2}
+BACKEND = "numpy" if np is not None else "python"
+
+def day_bounds(first_day, last_day):
+    """Local-midnight timestamps for every day in [first_day, last_day] plus the
+    midnight after it (DST-correct, unlike start // 86400). An empty range
+    (last_day before first_day) is just first_day's midnight."""
+    n = max(0, (last_day - first_day).days + 1)
+    return [int(dt.datetime.combine(first_day + dt.timedelta(days=i), dt.time()).timestamp())
+            for i in range(n + 1)]
+
+class SessionColumns:
+    def __init__(self, sessions=()):
+        self.n = 0   # source records consumed, for incremental extend()
+        self.start, self.end, self.kind = self._empty()
+        self.extend(sessions)
+
+    def _empty(self):
+        if np is not None:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.uint8)
+        return [], [], []
+
+    def __len__(self):
+        return len(self.start)
+
+    def extend(self, sessions):
+        sessions = list(sessions)
+        self.n += len(sessions)
+        if not sessions:
+            return
+        st = [int(x["start_ts"]) for x in sessions]
+        en = [int(x["end_ts"]) for x in sessions]
+        kd = [KIND_CODES.get(x["type"], 0) for x in sessions]
+        ordered = len(self) == 0 or st[0] >= self.start[-1]
+        ordered = ordered and all(a <= b for a, b in zip(st, st[1:]))
+        if np is not None:
+            self.start = np.concatenate([self.start, np.asarray(st, np.int64)])
+            self.end = np.concatenate([self.end, np.asarray(en, np.int64)])
+            self.kind = np.concatenate([self.kind, np.asarray(kd, np.uint8)])
+            if not ordered:
+                o = np.argsort(self.start, kind="stable")
+                self.start, self.end, self.kind = self.start[o], self.end[o], self.kind[o]
+        else:
+            self.start += st; self.end += en; self.kind += kd
+            if not ordered:
+                o = sorted(range(len(self.start)), key=self.start.__getitem__)
+                self.start = [self.start[i] for i in o]
+                self.end = [self.end[i] for i in o]
+                self.kind = [self.kind[i] for i in o]
+
+    @classmethod
+    def concat(cls, parts):
+        """One SessionColumns from several (re-sorted if they overlap)."""
+        out = cls()
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return out
+        if np is not None:
+            out.start = np.concatenate([p.start for p in parts])
+            out.end = np.concatenate([p.end for p in parts])
+            out.kind = np.concatenate([p.kind for p in parts])
+            if len(out.start) > 1 and (np.diff(out.start) < 0).any():
+                o = np.argsort(out.start, kind="stable")
+                out.start, out.end, out.kind = out.start[o], out.end[o], out.kind[o]
+        else:
+            for p in parts:
+                out.start += p.start; out.end += p.end; out.kind += p.kind
+            if any(a > b for a, b in zip(out.start, out.start[1:])):
+                o = sorted(range(len(out.start)), key=out.start.__getitem__)
+                out.start = [out.start[i] for i in o]
+                out.end = [out.end[i] for i in o]
+                out.kind = [out.kind[i] for i in o]
+        out.n = len(out.start)
+        return out
+
+    def _slice(self, lo_ts, hi_ts):
+        """Index range of sessions with lo_ts <= start < hi_ts."""
+        if np is not None:
+            return (int(np.searchsorted(self.start, lo_ts, "left")),
+                    int(np.searchsorted(self.start, hi_ts, "left")))
+        return bisect.bisect_left(self.start, lo_ts), bisect.bisect_left(self.start, hi_ts)
+
+    def by_day(self, first_day, last_day, kind="FOCUS"):
+        """Seconds of `kind` per day; list aligned with the days of the range."""
+        bounds = day_bounds(first_day, last_day)
+        ndays, code = len(bounds) - 1, KIND_CODES[kind]
+        lo, hi = self._slice(bounds[0], bounds[-1])
+        if np is not None:
+            s, e, k = self.start[lo:hi], self.end[lo:hi], self.kind[lo:hi]
+            m = k == code
+            idx = np.searchsorted(np.asarray(bounds, np.int64), s[m], "right") - 1
+            dur = np.maximum(e[m] - s[m], 0)
+            return np.bincount(idx, weights=dur, minlength=ndays)[:ndays].astype(np.int64).tolist()
+        out = [0] * ndays
+        for i in range(lo, hi):
+            if self.kind[i] == code:
+                out[bisect.bisect_right(bounds, self.start[i]) - 1] += max(0, self.end[i] - self.start[i])
+        return out
+
+    def by_week(self, first_day, last_day, kind="FOCUS"):
+        """[(monday, seconds)] for the Monday-aligned weeks touching the range."""
+        days = self.by_day(first_day, last_day, kind)
+        off = first_day.weekday()
+        if np is not None:
+            idx = (np.arange(len(days)) + off) // 7
+            weeks = np.bincount(idx, weights=np.asarray(days, np.int64)).astype(np.int64).tolist()
+        else:
+            weeks = [0] * ((len(days) + off + 6) // 7)
+            for i, v in enumerate(days):
+                weeks[(i + off) // 7] += v
+        monday = first_day - dt.timedelta(days=off)
+        return [(monday + dt.timedelta(weeks=i), v) for i, v in enumerate(weeks)]
+
+    def by_hour(self, first_day, last_day, kind="FOCUS"):
+        """Seconds of `kind` per local hour of day (24 buckets) over the range."""
+        bounds = day_bounds(first_day, last_day)
+        code = KIND_CODES[kind]
+        lo, hi = self._slice(bounds[0], bounds[-1])
+        if np is not None:
+            s, e, k = self.start[lo:hi], self.end[lo:hi], self.kind[lo:hi]
+            m = k == code
+            b = np.asarray(bounds, np.int64)
+            midnight = b[np.searchsorted(b, s[m], "right") - 1]
+            hour = np.clip((s[m] - midnight) // 3600, 0, 23)
+            dur = np.maximum(e[m] - s[m], 0)
+            return np.bincount(hour, weights=dur, minlength=24).astype(np.int64).tolist()
+        out = [0] * 24
+        for i in range(lo, hi):
+            if self.kind[i] == code:
+                midnight = bounds[bisect.bisect_right(bounds, self.start[i]) - 1]
+                out[min(23, (self.start[i] - midnight) // 3600)] += max(0, self.end[i] - self.start[i])
+        return out
+
+def longest_streak(days, first_day):
+    """(length, first, last) of the longest run of consecutive non-zero days."""
+    best = (0, None, None)
+    run = 0
+    for i, v in enumerate(days):
+        run = run + 1 if v > 0 else 0
+        if run > best[0]:
+            best = (run, first_day + dt.timedelta(days=i-run+1), first_day + dt.timedelta(days=i))
+    return best
+
+def rolling_average(days, window=7):
+    """Trailing `window`-day mean for each day (shorter at the start of the range)."""
+    if np is not None:
+        a = np.asarray(days, np.float64)
+        c = np.concatenate([[0.0], np.cumsum(a)])
+        i = np.arange(1, len(a) + 1)
+        lo = np.maximum(i - window, 0)
+        return ((c[i] - c[lo]) / (i - lo)).tolist()
+    out, acc = [], 0
+    for i, v in enumerate(days):
+        acc += v
+        if i >= window: acc -= days[i - window]
+        out.append(acc / min(i + 1, window))
+    return out
+
+# ---------- engine over the live state
+
+MONTH_CACHE = 240   # archived-month column sets kept (they never change)
+
+_engine = {"src": None, "cols": None, "months": collections.OrderedDict()}
+
+def engine(first_day, last_day):
+    """SessionColumns covering [first_day, last_day].
+
+    Archived months are converted once and cached by (month, size); the live
+    list only ever grows, so while it is the same object new sessions are
+    appended instead of rebuilding."""
+    if last_day < first_day:
+        return SessionColumns()
+    bounds = day_bounds(first_day, last_day)
+    parts = []
+    for key, rows in shared.session_parts(bounds[0], bounds[-1]):
+        if key == "live":
+            cols = _engine["cols"]
+            if cols is None or _engine["src"] is not rows or cols.n > len(rows):
+                cols = SessionColumns(rows)
+                _engine.update(src=rows, cols=cols)
+            elif cols.n < len(rows):
+                cols.extend(rows[cols.n:])
+        else:
+            cache = _engine["months"]
+            cols = cache.get(key)
+            if cols is None:
+                cols = cache[key] = SessionColumns(rows)
+                while len(cache) > MONTH_CACHE: cache.popitem(last=False)
+            else:
+                cache.move_to_end(key)
+        parts.append(cols)
+    return parts[0] if len(parts) == 1 else SessionColumns.concat(parts)
+
+def summary(first_day, last_day, window=7):
+    """The extra figures ReportsTab shows for a range."""
+    cols = engine(first_day, last_day)
+    days = cols.by_day(first_day, last_day)
+    hours = cols.by_hour(first_day, last_day)
+    peak = max(range(24), key=hours.__getitem__)
+    return {
+        "streak": longest_streak(days, first_day),
+        "peak_hour": (peak, hours[peak]),
+        "rolling_avg": rolling_average(days, window)[-1] if days else 0.0,
+        "window": window,
+        "backend": BACKEND,
+    }
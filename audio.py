@@ -0,0 +1,170 @@
+# audio.py
+"""Timer alerts played off the Tk thread.
+
+alert(kind) only puts the kind on a queue (or rings the Tk bell when no
+player is available) and returns; one daemon worker plays them. Alerts that
+arrive together, e.g. a session ending while the next one starts, are
+merged into the most important of them, and a full queue drops new alerts
+instead of piling up sound.
+
+Tones are rendered once into small WAV buffers and cached. Players, in
+order: winsound (Windows, from memory), afplay (macOS), paplay / aplay
+(Linux); anything else falls back to the bell. `enabled` mirrors
+options.sound_enabled and is set by the app when it loads or saves options,
+so alerting never touches data.json.
+
+    python audio.py   # play each alert once
+"""
+import io, math, os, queue, shutil, struct, subprocess, sys, tempfile, threading, time, wave
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+# kind -> (frequency Hz, duration ms); PRIORITY decides which merged alert wins
+TONES = {"start": (880, 120), "end": (1046, 180), "ok": (740, 120)}
+PRIORITY = {"ok": 0, "start": 1, "end": 2}
+RATE = 22050
+MERGE_WINDOW = 0.15   # seconds; alerts closer together than this play once
+QUEUE_SIZE = 4
+
+enabled = True
+_queue = queue.Queue(QUEUE_SIZE)
+_worker = None
+_tones = {}          # (freq, ms) -> WAV bytes
+_files = {}          # (freq, ms) -> temp .wav path, for command-line players
+_player = None       # resolved once: "winsound", a command list, or "" for bell-only
+_lock = threading.Lock()
+stats = {"queued": 0, "played": 0, "merged": 0, "dropped": 0, "bell": 0}
+
+def tone(freq, ms):
+    """16-bit mono WAV of a sine tone with a short fade in/out (no clicks)."""
+    key = (freq, ms)
+    buf = _tones.get(key)
+    if buf is None:
+        n = RATE * ms // 1000
+        fade = max(1, RATE // 200)   # 5 ms
+        frames = bytearray()
+        for i in range(n):
+            env = min(1.0, i / fade, (n - i) / fade)
+            frames += struct.pack("<h", int(12000 * env * math.sin(2 * math.pi * freq * i / RATE)))
+        out = io.BytesIO()
+        with wave.open(out, "wb") as w:
+            w.setnchannels(1); w.setsampwidth(2); w.setframerate(RATE)
+            w.writeframes(bytes(frames))
+        buf = _tones[key] = out.getvalue()
+    return buf
+
+def player():
+    """The backend to use, found once (a few PATH lookups, no I/O after that)."""
+    global _player
+    if _player is None:
+        if winsound is not None:
+            _player = "winsound"
+        elif sys.platform == "darwin" and shutil.which("afplay"):
+            _player = ["afplay"]
+        elif shutil.which("paplay"):
+            _player = ["paplay"]
+        elif shutil.which("aplay"):
+            _player = ["aplay", "-q"]
+        else:
+            _player = ""
+    return _player
+
+def _tone_file(key):
+    path = _files.get(key)
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=f"focusforge-{key[0]}-", suffix=".wav")
+        with os.fdopen(fd, "wb") as f:
+            f.write(tone(*key))
+        _files[key] = path
+    return path
+
+def _play(kind):
+    key = TONES.get(kind, TONES["ok"])
+    p = player()
+    if p == "winsound":
+        winsound.PlaySound(tone(*key), winsound.SND_MEMORY)
+    else:
+        subprocess.run(p + [_tone_file(key)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+
+def _run():
+    # render every tone up front so the first alert doesn't pay for it
+    for key in TONES.values():
+        if player() == "winsound": tone(*key)
+        else: _tone_file(key)
+    while True:
+        kind = _queue.get()
+        if kind is None:
+            return
+        # anything else arriving within the window collapses into one alert
+        deadline = time.monotonic() + MERGE_WINDOW
+        while True:
+            try:
+                more = _queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if more is None:
+                return
+            stats["merged"] += 1
+            if PRIORITY.get(more, 0) > PRIORITY.get(kind, 0):
+                kind = more
+        try:
+            _play(kind)
+            stats["played"] += 1
+        except Exception:
+            pass   # a missing/busy audio device must never take the app down
+
+def start():
+    """Start the worker (idempotent); alert() calls this on first use."""
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="audio", daemon=True)
+            _worker.start()
+
+def alert(kind="ok", bell=None):
+    """Queue an alert and return at once. `bell` rings the Tk bell when there
+    is no audio player; call this from the Tk thread so that stays safe."""
+    if not enabled:
+        return
+    if not player():
+        if bell is not None:
+            stats["bell"] += 1
+            try:
+                bell()
+            except Exception:
+                pass
+        return
+    start()
+    try:
+        _queue.put_nowait(kind)
+        stats["queued"] += 1
+    except queue.Full:
+        stats["dropped"] += 1
+
+def stop():
+    """Let the worker finish what is queued and exit; remove the tone files."""
+    global _worker
+    with _lock:
+        w, _worker = _worker, None
+    if w is not None:
+        try:
+            _queue.put(None, timeout=1)
+        except queue.Full:
+            pass
+        w.join(timeout=2)
+    for path in _files.values():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _files.clear()
+
+if __name__ == "__main__":
+    print(f"player: {player() or 'bell only'}")
+    for kind in TONES:
+        alert(kind, bell=lambda: print("\a", end="", flush=True))
+        time.sleep(0.5)
+    stop()
+    print(stats)
@@ -0,0 +1,130 @@
+# benchmarks/generate.py
+"""Seeded synthetic FocusForge data.
+
+    python benchmarks/generate.py out/data.json --sessions 100000 --years 3 \\
+        --tasks 200 --subtasks 5 --notes 300 --events 20 --seed 1
+
+Sessions follow the app's rhythm: focus blocks alternating with short breaks
+and a long break every few focus sessions, starting in the morning, busier on
+weekdays. The same arguments always produce the same data.
+"""
+import argparse, datetime as dt, os, random, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import shared, calendar_events
+
+COLORS = ["#cccccc", "#e74c3c", "#3498db", "#9b59b6", "#27ae60"]
+DURATIONS = {"FOCUS": 25 * 60, "SHORT": 5 * 60, "LONG": 15 * 60}
+
+def sessions(n, years, seed=1, end=None):
+    """n sessions spread over the `years` years before `end` (default: now)."""
+    rng = random.Random(seed)
+    end = end or dt.date.today()
+    days = [end - dt.timedelta(days=i) for i in range(int(years * 365))][::-1]
+    weights = [1.0 if d.weekday() < 5 else 0.4 for d in days]
+    per_day = [0] * len(days)
+    for i in rng.choices(range(len(days)), weights, k=n):
+        per_day[i] += 1
+    out = []
+    for day, count in zip(days, per_day):
+        if not count: continue
+        # squeeze very busy days into ~16 hours
+        scale = min(1.0, 16 * 3600 / (count * 20 * 60))
+        t = int(dt.datetime.combine(day, dt.time(8)).timestamp()) + rng.randint(0, 3 * 3600)
+        focus_run = 0
+        kind = "FOCUS"
+        for _ in range(count):
+            length = int(DURATIONS[kind] * rng.uniform(0.9, 1.1) * scale) or 1
+            out.append({"start_ts": t, "end_ts": t + length, "type": kind})
+            t += length + int(rng.randint(0, 120) * scale)
+            if kind == "FOCUS":
+                focus_run += 1
+                kind = "LONG" if focus_run % 4 == 0 else "SHORT"
+            else:
+                kind = "FOCUS"
+    return out
+
+def tasks(n, subtasks, seed=1):
+    rng = random.Random(seed + 1)
+    out, next_id = [], 1
+    for i in range(n):
+        weights = [100 // subtasks] * subtasks
+        weights[-1] += 100 - sum(weights)
+        subs = []
+        for j, w in enumerate(weights):
+            subs.append({"id": next_id + 1 + j, "title": f"Step {j+1}", "weight": w, "done": rng.random() < 0.4})
+        out.append({"id": next_id, "title": f"Task {i+1}", "subtasks": subs})
+        next_id += subtasks + 1
+    return out, next_id
+
+def notes(n, years, seed=1, end=None):
+    rng = random.Random(seed + 2)
+    end = end or dt.date.today()
+    span = int(years * 365)
+    out = {}
+    while len(out) < min(n, span):
+        d = end - dt.timedelta(days=rng.randrange(span))
+        out[d.isoformat()] = {"title": f"Note {len(out)+1}", "color": rng.choice(COLORS), "note": ""}
+    return out
+
+def events(n, years, seed=1, end=None):
+    rng = random.Random(seed + 3)
+    end = end or dt.date.today()
+    state = {}
+    for i in range(n):
+        start = end - dt.timedelta(days=rng.randrange(int(years * 365)))
+        length = rng.choice([0, 0, 0, 1, 4])
+        repeat = rng.choice(calendar_events.REPEATS)
+        until = start + dt.timedelta(days=rng.randrange(30, 1000)) if repeat and rng.random() < 0.5 else None
+        calendar_events.new_event(state, f"Event {i+1}", start, start + dt.timedelta(days=length),
+                                  repeat, 1, until, rng.choice(COLORS))
+    return state.get("events", [])
+
+def make_state(n_sessions=10_000, years=1, n_tasks=50, n_subtasks=4, n_notes=100, n_events=10, seed=1):
+    sess = sessions(n_sessions, years, seed)
+    task_list, next_id = tasks(n_tasks, n_subtasks, seed)
+    focus = sum(1 for x in sess if x["type"] == "FOCUS")
+    return {
+        "coins": focus * 10, "xp": focus * 15, "sessions_completed": focus,
+        "options": dict(shared.DEFAULTS["options"]),
+        "inventory": {"hat": True, "pet_slime": False},
+        "tasks": task_list, "next_id": next_id,
+        "events": events(n_events, years, seed),
+        "calendar": notes(n_notes, years, seed),
+        "sessions": sess,
+    }
+
+def write(path, **params):
+    """Generate a dataset and store it at `path` through shared (archive and all).
+    Returns the state that was written."""
+    state = make_state(**params)
+    shared.DATA_PATH = os.path.abspath(path)
+    os.makedirs(os.path.dirname(shared.DATA_PATH), exist_ok=True)
+    shared.invalidate()
+    shared.save(state)   # not from load(): taken as the complete history
+    shared.invalidate()
+    return state
+
+def add_arguments(ap):
+    ap.add_argument("--sessions", type=int, default=10_000)
+    ap.add_argument("--years", type=float, default=1)
+    ap.add_argument("--tasks", type=int, default=50)
+    ap.add_argument("--subtasks", type=int, default=4)
+    ap.add_argument("--notes", type=int, default=100)
+    ap.add_argument("--events", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+
+def params(args):
+    return dict(n_sessions=args.sessions, years=args.years, n_tasks=args.tasks, n_subtasks=args.subtasks,
+                n_notes=args.notes, n_events=args.events, seed=args.seed)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("path")
+    add_arguments(ap)
+    args = ap.parse_args()
+    state = write(args.path, **params(args))
+    print(f"{args.path}: {len(state['sessions'])} sessions, {len(state['tasks'])} tasks, "
+          f"{len(state['calendar'])} notes, {len(state['events'])} events")
@@ -0,0 +1,237 @@
+# benchmarks/run.py
+"""Time the data layer, the Tk tabs and the Reward World frame loop on a
+generated dataset and write the results as JSON.
+
+    python benchmarks/run.py --sessions 100000 --years 3      # -> benchmarks/results/<date>-<commit>.json
+    python benchmarks/run.py --compare old.json new.json      # side by side, with ratios
+
+Tk timings need a display: $DISPLAY, or Xvfb started here when it is
+installed; otherwise only the data path behind each tab is timed. Reward
+World runs on the SDL dummy video driver.
+"""
+import argparse, datetime as dt, json, os, platform, shutil, subprocess, sys, tempfile, time, types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import generate
+import shared, analytics, serializers
+from task_store import TaskIndex
+from calendar_events import EventCalendar
+
+def timed(fn, repeat=5, setup=None):
+    """{"min_ms", "mean_ms", "n"} over `repeat` calls of fn (setup() untimed before each)."""
+    runs = []
+    for _ in range(repeat):
+        if setup: setup()
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {"min_ms": min(runs) * 1000, "mean_ms": sum(runs) / len(runs) * 1000, "n": repeat}
+
+# ---------- data layer
+
+def bench_shared(results):
+    results["load.cold"] = timed(shared.load, setup=shared.invalidate)
+    shared.load()
+    results["load.warm"] = timed(shared.load, repeat=50)
+    results["save"] = timed(lambda: shared.save(shared.load()))
+    now = shared.now_ts()
+    results["append_session"] = timed(lambda: shared.append_session(now - 1500, now, "FOCUS"), repeat=50)
+    results["reward"] = timed(lambda: shared.reward(1, 1, 0), repeat=50)
+
+def report_range(first, last):
+    """What ReportsTab._range computes, minus the widgets."""
+    by_day = dict(shared.daily_between(first, last))
+    sum(d["FOCUS"] for d in by_day.values()); sum(d["SHORT"] + d["LONG"] for d in by_day.values())
+    shared.load()["sessions_completed"]
+    analytics.summary(first, last)
+
+def bench_reports(results, years):
+    today = dt.date.today()
+    for name, days in (("week", 7), ("month", 31), ("year", 365), ("all", int(years * 365))):
+        first = today - dt.timedelta(days=days - 1)
+        results[f"reports.range.{name}"] = timed(lambda: report_range(first, today))
+
+def bench_tasks_data(results):
+    idx = TaskIndex()
+    results["tasks.index.build"] = timed(lambda: idx.bind(shared.load()), setup=lambda: setattr(idx, "src", None))
+    results["tasks.rows"] = timed(idx.rows)
+    results["tasks.rows.first_page"] = timed(lambda: idx.rows(200, set()))
+
+def bench_calendar_data(results):
+    import tk_app
+    s = shared.load()
+    today = dt.date.today()
+    months = [((today.year * 12 + today.month - 1 - i) // 12, (today.year * 12 + today.month - 1 - i) % 12 + 1)
+              for i in range(12)]
+    def draw_months():
+        tab = types.SimpleNamespace(indexed=None, by_month={})
+        ev = EventCalendar().bind(s)
+        for y, m in months:
+            tk_app.CalendarTab._month_notes(tab, s["calendar"], y, m)
+            ev.month(y, m)
+    results["calendar.months12.data"] = timed(draw_months)
+
+# ---------- Tk (needs a display)
+
+def start_display():
+    """A usable $DISPLAY, starting Xvfb if needed. Returns (ok, process or None)."""
+    if os.environ.get("DISPLAY"):
+        return True, None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return False, None
+    proc = subprocess.Popen([xvfb, ":99", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    os.environ["DISPLAY"] = ":99"
+    return proc.poll() is None, proc
+
+def bench_tk(results, years):
+    import tkinter as tk
+    import tk_app
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        def settle(): root.update_idletasks()
+
+        t0 = time.perf_counter()
+        tasks = tk_app.TasksTab(root, stats_refresh_cb=lambda: None); tasks.pack(); settle()
+        results["tk.tasks.first_build"] = {"min_ms": (time.perf_counter() - t0) * 1000, "mean_ms": None, "n": 1}
+        results["tk.tasks.refresh_tree.unchanged"] = timed(lambda: (tasks.refresh_tree(), settle()))
+        def edit():
+            with shared.transaction() as s:
+                idx = tasks._index(s)
+                t = idx.src[0]
+                idx.toggle(t["id"], t["subtasks"][0]["id"])
+        results["tk.tasks.refresh_tree.one_edit"] = timed(lambda: (tasks.refresh_tree(), settle()), setup=edit)
+        results["tk.tasks.refresh_tree.reloaded"] = timed(lambda: (tasks.refresh_tree(), settle()),
+                                                          setup=shared.invalidate)
+        tasks.destroy()
+
+        cal = tk_app.CalendarTab(root); cal.pack(); settle()
+        results["tk.calendar.draw"] = timed(lambda: (cal.draw(), settle()), repeat=10)
+        results["tk.calendar.next_month"] = timed(lambda: (cal.next_month(), settle()), repeat=24)
+        cal.destroy()
+
+        rep = tk_app.ReportsTab(root); rep.pack(); settle()
+        today = dt.datetime.now()
+        for name, days in (("week", 7), ("month", 31), ("year", 365), ("all", int(years * 365))):
+            start = (today - dt.timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            results[f"tk.reports.range.{name}"] = timed(lambda: (rep._range(start, today), settle()))
+        rep.group.set("Day")
+        results["tk.reports.chart.all_days"] = timed(lambda: (rep._chart(), settle()))
+        rep.chart.canvas.update()
+        results["tk.reports.chart.scroll"] = timed(lambda: (rep.chart.canvas.yview_scroll(7, "units"), settle()),
+                                                   repeat=50)
+        rep.destroy()
+    finally:
+        root.destroy()
+
+# ---------- Reward World
+
+def bench_pygame(results, frames=300):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import pg_game
+    results["pg.shop.build"] = timed(pg_game.build_shop)
+    shop, atlas, layers = pg_game.build_shop()
+    s = shared.load()
+    for mode in ("dirty", "full"):
+        r = pg_game.Renderer(shop, atlas, layers)
+        r.state(s)
+        def frame(i=[0]):
+            i[0] += 1
+            if mode == "full":
+                r.invalidate()
+            r.pointer((shop.x0 + i[0] % shop.rect.w, shop.y0 + 10))   # sweep across a row of cells
+            r.flush()
+        results[f"pg.frame.{mode}"] = timed(frame, repeat=frames)
+    keys = tuple(it.key for it in layers)
+    results["pg.avatar.compose"] = timed(lambda: r.compose(keys), repeat=50)
+    results["pg.shop.cell_at"] = timed(lambda: shop.cell_at((shop.rect.right - 5, shop.rect.bottom - 5)), repeat=200)
+    pygame.quit()
+
+# ---------- driver
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run(args):
+    work = tempfile.mkdtemp(prefix="focusforge-bench-")
+    results, skipped = {}, {}
+    try:
+        t0 = time.perf_counter()
+        generate.write(os.path.join(work, "data.json"), **generate.params(args))
+        results["generate"] = {"min_ms": (time.perf_counter() - t0) * 1000, "mean_ms": None, "n": 1}
+        bench_shared(results)
+        bench_reports(results, args.years)
+        bench_tasks_data(results)
+        bench_calendar_data(results)
+        ok, xvfb = (False, None) if args.no_tk else start_display()
+        try:
+            if ok:
+                bench_tk(results, args.years)
+            else:
+                skipped["tk"] = "no display (set DISPLAY or install Xvfb)"
+        except Exception as e:   # tkinter missing or the display went away
+            skipped["tk"] = f"{type(e).__name__}: {e}"
+        finally:
+            if xvfb: xvfb.terminate()
+        try:
+            bench_pygame(results)
+        except ImportError as e:
+            skipped["pygame"] = str(e)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return {
+        "meta": {
+            "commit": commit(), "when": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "backend": shared.BACKEND, "analytics": analytics.BACKEND,
+            "orjson": serializers.USE_ORJSON, "params": generate.params(args), "skipped": skipped,
+        },
+        "results": results,
+    }
+
+def compare(a_path, b_path):
+    with open(a_path) as f: a = json.load(f)
+    with open(b_path) as f: b = json.load(f)
+    print(f"{'':34} {a['meta']['commit'] or a_path:>12} {b['meta']['commit'] or b_path:>12}   ratio")
+    for name in sorted(set(a["results"]) | set(b["results"])):
+        x = a["results"].get(name, {}).get("min_ms")
+        y = b["results"].get(name, {}).get("min_ms")
+        ratio = f"{y / x:6.2f}x" if x and y else ""
+        fmt = lambda v: f"{v:10.3f}ms" if v is not None else f"{'-':>12}"
+        print(f"{name:34} {fmt(x)} {fmt(y)}   {ratio}")
+
+def main():
+    ap = argparse.ArgumentParser(description="FocusForge benchmarks")
+    generate.add_arguments(ap)
+    ap.add_argument("--out", help="result file (default benchmarks/results/<date>-<commit>.json)")
+    ap.add_argument("--no-tk", action="store_true", help="skip the Tk timings even if a display is available")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = ap.parse_args()
+    if args.compare:
+        return compare(*args.compare)
+    doc = run(args)
+    out = args.out or os.path.join(HERE, "results",
+                                   f"{dt.date.today().isoformat()}-{doc['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    for name, r in doc["results"].items():
+        print(f"{name:34} {r['min_ms']:10.3f} ms")
+    for what, why in doc["meta"]["skipped"].items():
+        print(f"skipped {what}: {why}")
+    print(f"-> {out}")
+
+if __name__ == "__main__":
+    main()
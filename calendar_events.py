@@ -0,0 +1,165 @@
+# calendar_events.py
+"""Recurring and multi-day calendar events.
+
+An event is stored once in state["events"], whatever its length or how long
+it repeats:
+
+    {"id": 7, "title": "Exam week", "color": "#e74c3c", "note": "",
+     "start": "2025-06-02", "end": "2025-06-06",       # inclusive, end optional
+     "repeat": None | "daily" | "weekly" | "monthly" | "yearly",
+     "every": 1, "until": None | "2025-12-31"}
+
+EventCalendar keeps the events in an interval index over the span each one
+can touch (start .. until+length, open-ended if it repeats forever) and
+expands occurrences for one month at a time, caching the result, so drawing
+a month costs the same whether an event repeats for a year or forever.
+The old one-note-per-date state["calendar"] map is unchanged.
+"""
+import calendar, datetime as dt
+
+REPEATS = (None, "daily", "weekly", "monthly", "yearly")
+FOREVER = dt.date.max.toordinal()
+
+def _date(iso):
+    return dt.date.fromisoformat(iso) if iso else None
+
+class IntervalIndex:
+    """Static interval tree: items sorted by start, each node of the implicit
+    balanced tree over that order storing the max end of its subtree, so a
+    query visits O(log n + matches) nodes."""
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda x: x[0])   # (lo, hi, value)
+        self.maxhi = [0] * len(self.items)
+        self._build(0, len(self.items))
+
+    def _build(self, a, b):
+        if a >= b: return -1
+        m = (a + b) // 2
+        self.maxhi[m] = max(self.items[m][1], self._build(a, m), self._build(m + 1, b))
+        return self.maxhi[m]
+
+    def __len__(self):
+        return len(self.items)
+
+    def overlapping(self, lo, hi):
+        """Values of items with item.lo <= hi and item.hi >= lo, in start order."""
+        out, stack = [], [(0, len(self.items))]
+        while stack:
+            a, b = stack.pop()
+            if a >= b: continue
+            m = (a + b) // 2
+            if self.maxhi[m] < lo: continue
+            if self.items[m][0] <= hi:
+                if self.items[m][1] >= lo: out.append(self.items[m])
+                stack.append((m + 1, b))
+            stack.append((a, m))
+        out.sort(key=lambda x: x[0])
+        return [x[2] for x in out]
+
+def span(ev):
+    """(first day, last day it can cover) as ordinals; FOREVER if unbounded."""
+    start = _date(ev["start"])
+    length = (_date(ev.get("end")) or start) - start
+    if not ev.get("repeat"):
+        return start.toordinal(), (start + length).toordinal()
+    until = _date(ev.get("until"))
+    return start.toordinal(), (until + length).toordinal() if until else FOREVER
+
+def _add_months(d, n):
+    """d moved n months on, or None if that month has no such day (31st, Feb 29)."""
+    y, m = divmod(d.month - 1 + n, 12)
+    y += d.year
+    if d.day > calendar.monthrange(y, m + 1)[1]:
+        return None
+    return d.replace(year=y, month=m + 1)
+
+def occurrences(ev, lo, hi):
+    """Start dates of the occurrences of ev that overlap [lo, hi]."""
+    start = _date(ev["start"])
+    length = ((_date(ev.get("end")) or start) - start).days
+    until = _date(ev.get("until")) or dt.date.max
+    repeat, every = ev.get("repeat"), max(1, int(ev.get("every", 1)))
+    first = lo - dt.timedelta(days=length)   # earliest start still reaching lo
+    if not repeat:
+        return [start] if start <= hi and start >= first else []
+    out = []
+    if repeat in ("daily", "weekly"):
+        step = every * (7 if repeat == "weekly" else 1)
+        i = max(0, -(-(first - start).days // step))
+        d = start + dt.timedelta(days=i * step)
+        while d <= hi and d <= until:
+            out.append(d)
+            d += dt.timedelta(days=step)
+    else:
+        step = every * (12 if repeat == "yearly" else 1)
+        n = (first.year - start.year) * 12 + first.month - start.month
+        i = max(0, n // step)
+        while True:
+            month = _add_months(start.replace(day=1), i * step)
+            if month > hi or month > until: break
+            d = _add_months(start, i * step)
+            if d is not None and first <= d <= hi and d <= until:
+                out.append(d)
+            i += 1
+    return out
+
+class EventCalendar:
+    MONTH_CACHE = 36   # expanded months kept
+
+    def __init__(self):
+        self.src = None
+        self.n = 0
+        self.index = IntervalIndex([])
+        self.months = {}   # (year, month) -> {iso: [event, ...]}
+
+    def bind(self, state):
+        """Index state["events"]; kept while it is the same, unmodified list."""
+        events = state.get("events", [])
+        if events is not self.src or len(events) != self.n:
+            self.src, self.n = events, len(events)
+            self.index = IntervalIndex([span(ev) + (ev,) for ev in events])
+            self.months = {}
+        return self
+
+    def invalidate(self):
+        self.src = None
+
+    def month(self, year, month):
+        """{iso: [events]} for the days of one month, expanded on first use."""
+        key = (year, month)
+        days = self.months.get(key)
+        if days is None:
+            lo = dt.date(year, month, 1)
+            hi = dt.date(year, month, calendar.monthrange(year, month)[1])
+            days = {}
+            for ev in self.index.overlapping(lo.toordinal(), hi.toordinal()):
+                length = ((_date(ev.get("end")) or _date(ev["start"])) - _date(ev["start"])).days
+                for d in occurrences(ev, lo, hi):
+                    for k in range(length + 1):
+                        day = d + dt.timedelta(days=k)
+                        if lo <= day <= hi:
+                            days.setdefault(day.isoformat(), []).append(ev)
+            if len(self.months) >= self.MONTH_CACHE:
+                self.months.pop(next(iter(self.months)))
+            days = self.months[key] = days
+        return days
+
+    def on(self, day):
+        return self.month(day.year, day.month).get(day.isoformat(), [])
+
+def new_event(state, title, start, end=None, repeat=None, every=1, until=None, color="#cccccc", note=""):
+    """Append an event to state["events"] (inside a shared.transaction())."""
+    if repeat not in REPEATS:
+        raise ValueError(f"repeat must be one of {REPEATS}")
+    if end is not None and end < start:
+        raise ValueError("end is before start")
+    events = state.setdefault("events", [])
+    ev = {"id": max((e["id"] for e in events), default=0) + 1, "title": title,
+          "color": color, "note": note, "start": start.isoformat(),
+          "end": end.isoformat() if end else None, "repeat": repeat,
+          "every": int(every), "until": until.isoformat() if until else None}
+    events.append(ev)
+    return ev
+
+def delete_event(state, event_id):
+    state["events"] = [e for e in state.get("events", []) if e["id"] != event_id]
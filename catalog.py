@@ -0,0 +1,63 @@
+# catalog.py
+"""Reward World shop items, defined in catalog.json.
+
+    {"items": [{"key": "hat", "name": "Hat", "cost": 30, "layer": 3,
+                "offset": [-32, -44], "sprite": {...}}, ...]}
+
+layer orders the items on the avatar (low first); offset is where the
+sprite's top-left corner goes relative to the avatar's centre. A sprite is
+an image file relative to the catalog ({"image": "sprites/hat.png"}) or a
+small vector shape: {"circle": r}, {"rect": [w, h]} or
+{"polygon": [[x, y], ...]}, each with a "color". Items marked "worn" (the
+body) are always drawn and not for sale.
+
+No pygame in here: cli.py prices inventories through costs() too.
+"""
+import json, os
+from collections import namedtuple
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "catalog.json")
+SHAPES = ("image", "circle", "rect", "polygon")
+
+Item = namedtuple("Item", "key name cost layer sprite offset worn")
+
+_cache = {}   # path -> (mtime_ns, [Item])
+
+def load(path=None):
+    """Items in file order (the shop order); re-read only when the file changes."""
+    path = os.path.abspath(path or CATALOG_PATH)
+    mtime = os.stat(path).st_mtime_ns
+    hit = _cache.get(path)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    items, seen = [], set()
+    for n, raw in enumerate(doc.get("items", []), 1):
+        try:
+            key = str(raw["key"])
+            sprite = dict(raw["sprite"])
+            worn = bool(raw.get("worn", False))
+            cost = None if worn else int(raw["cost"])
+            dx, dy = raw.get("offset", (0, 0))
+            item = Item(key, str(raw.get("name", key)), cost, int(raw.get("layer", 0)),
+                        sprite, (int(dx), int(dy)), worn)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: item {n}: {type(e).__name__}: {e}") from None
+        if key in seen:
+            raise ValueError(f"{path}: item {n}: duplicate key {key!r}")
+        if not any(s in sprite for s in SHAPES):
+            raise ValueError(f"{path}: item {n}: sprite needs one of {', '.join(SHAPES)}")
+        if "image" in sprite:
+            sprite["image"] = os.path.join(os.path.dirname(path), sprite["image"])
+        seen.add(key)
+        items.append(item)
+    _cache[path] = (mtime, items)
+    return items
+
+def for_sale(path=None):
+    return [it for it in load(path) if not it.worn]
+
+def costs(path=None):
+    """{key: cost} of everything in the shop."""
+    return {it.key: it.cost for it in for_sale(path)}
@@ -0,0 +1,316 @@
+# cli.py
+"""Headless bulk import / export for FocusForge data.
+
+    python cli.py import sessions history.csv     # start_ts,end_ts,type (epoch seconds or ISO times)
+    python cli.py import tasks tasks.jsonl        # {"title": ..., "subtasks": [{"title", "weight", "done"}]}
+    python cli.py import notes notes.csv          # date,title,color,note
+    python cli.py export sessions --from 2024-01-01 --to 2024-12-31 -o 2024.csv
+    python cli.py recompute [--dry-run]           # coins / XP / sessions from the history
+
+The format comes from the file extension (.csv, .jsonl / .ndjson) or
+--format; "-" reads stdin / writes stdout. Input is streamed, validated row
+by row and written in batches (--batch), so memory stays flat however many
+rows there are. Bad rows are reported with their line number and skipped
+(--strict stops at the first one). Progress and throughput go to stderr.
+"""
+import argparse, contextlib, csv, datetime as dt, itertools, json, os, sys, time
+try:
+    import resource
+except ImportError:          # Windows
+    resource = None
+
+import catalog, shared
+from shared import transaction
+from task_store import TaskIndex
+
+KIND_ALIASES = {"FOCUS": "FOCUS", "WORK": "FOCUS", "POMODORO": "FOCUS",
+                "SHORT": "SHORT", "BREAK": "SHORT", "SHORT_BREAK": "SHORT",
+                "LONG": "LONG", "LONG_BREAK": "LONG"}
+MAX_SESSION = 24 * 3600
+FOREVER = int(dt.datetime(9999, 1, 1).timestamp())   # "no upper bound" for ranges
+
+# ---------- reading
+
+def open_in(path):
+    if path == "-":
+        sys.stdin.reconfigure(encoding="utf-8", newline="")
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, "r", encoding="utf-8", newline="")
+
+def open_out(path):
+    if path in (None, "-"):
+        sys.stdout.reconfigure(encoding="utf-8", newline="")
+        return contextlib.nullcontext(sys.stdout)
+    return open(path, "w", encoding="utf-8", newline="")
+
+def guess_format(path, fmt):
+    if fmt:
+        return fmt
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    raise SystemExit(f"can't tell the format of {path!r}; pass --format csv|jsonl")
+
+def read_rows(f, fmt):
+    """(line number, dict) for each input row."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, e
+
+# ---------- validation
+
+def parse_ts(v):
+    if isinstance(v, (int, float)):
+        return int(v)
+    v = str(v).strip()
+    try:
+        return int(float(v))
+    except ValueError:
+        return int(dt.datetime.fromisoformat(v).timestamp())
+
+def parse_bool(v):
+    if isinstance(v, bool):
+        return v
+    v = str(v).strip().lower()
+    if v in ("1", "true", "yes", "y", "x", "✓", "done"):
+        return True
+    if v in ("", "0", "false", "no", "n"):
+        return False
+    raise ValueError(f"not a yes/no value: {v!r}")
+
+def session(row):
+    kind = KIND_ALIASES.get(str(row.get("type", "")).strip().upper())
+    if kind is None:
+        raise ValueError(f"unknown session type {row.get('type')!r}")
+    start, end = parse_ts(row["start_ts"]), parse_ts(row["end_ts"])
+    if not 0 <= end - start <= MAX_SESSION:
+        raise ValueError(f"end_ts - start_ts = {end - start}s (want 0..{MAX_SESSION})")
+    return {"start_ts": start, "end_ts": end, "type": kind}
+
+def subtask(row):
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValueError("subtask without a title")
+    weight = int(row.get("weight", 0))
+    if not 0 <= weight <= 100:
+        raise ValueError(f"weight {weight} outside 0..100")
+    return {"title": title, "weight": weight, "done": parse_bool(row.get("done", False))}
+
+def task(row):
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValueError("task without a title")
+    return {"title": title, "subtasks": [subtask(x) for x in row.get("subtasks") or []]}
+
+def csv_tasks(rows):
+    """CSV task rows are task,subtask,weight,done; consecutive rows with the same
+    task make one task (a row with an empty subtask is a task without one)."""
+    cur = None
+    for n, row in rows:
+        if isinstance(row, Exception):
+            yield n, row; continue
+        title = str(row.get("task") or "").strip()
+        if cur is not None and title != cur[1]["title"]:
+            yield cur
+            cur = None
+        try:
+            if cur is None:
+                cur = (n, task({"title": title}))
+            if row.get("subtask"):
+                cur[1]["subtasks"].append(subtask({"title": row["subtask"], "weight": row.get("weight", 0),
+                                                   "done": row.get("done", "")}))
+        except (ValueError, TypeError) as e:
+            yield n, e
+    if cur is not None:
+        yield cur
+
+def note(row):
+    day = dt.date.fromisoformat(str(row.get("date", "")).strip()).isoformat()
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValueError("note without a title")
+    color = str(row.get("color") or "#cccccc").strip()
+    if not (len(color) == 7 and color.startswith("#") and all(c in "0123456789abcdefABCDEF" for c in color[1:])):
+        raise ValueError(f"color {color!r} is not #RRGGBB")
+    return day, {"title": title, "color": color, "note": str(row.get("note") or "")}
+
+# ---------- writing
+
+def write_sessions(batch):
+    shared.import_sessions(batch)
+
+def write_tasks(batch):
+    with transaction() as s:
+        idx = TaskIndex().bind(s)
+        for t in batch:
+            new = idx.add_task(t["title"])
+            for sub in t["subtasks"]:
+                idx.add_subtask(new["id"], sub["title"], sub["weight"])["done"] = sub["done"]
+
+def write_notes(batch):
+    with transaction() as s:
+        s.setdefault("calendar", {}).update(batch)
+
+# ---------- progress
+
+class Progress:
+    """rows/s and peak memory on stderr, refreshed after every batch."""
+    def __init__(self, what, quiet=False):
+        self.what, self.quiet = what, quiet
+        self.ok = self.bad = 0
+        self.t0 = time.perf_counter()
+
+    def rate(self):
+        return self.ok / max(1e-9, time.perf_counter() - self.t0)
+
+    def show(self, end="\r"):
+        if self.quiet or (end == "\r" and not sys.stderr.isatty()): return
+        rss = ""
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = peak / 1024 if sys.platform != "darwin" else peak / 2**20   # KiB on Linux, bytes on macOS
+            rss = f", peak RSS {peak:,.0f} MiB"
+        print(f"{self.what}: {self.ok:,} rows ({self.bad:,} rejected), {self.rate():,.0f} rows/s{rss}",
+              end=end, file=sys.stderr, flush=True)
+
+    def reject(self, n, err, strict):
+        self.bad += 1
+        if self.bad <= 20 or strict:
+            print(f"\nline {n}: {err}", file=sys.stderr)
+        if strict:
+            raise SystemExit(1)
+
+# ---------- commands
+
+IMPORTERS = {"sessions": (session, write_sessions), "tasks": (task, write_tasks), "notes": (note, write_notes)}
+
+def cmd_import(args):
+    fmt = guess_format(args.path, args.format)
+    parse, write = IMPORTERS[args.what]
+    prog = Progress(f"import {args.what}", args.quiet)
+    with open_in(args.path) as f:
+        rows = read_rows(f, fmt)
+        if args.what == "tasks" and fmt == "csv":
+            rows, parse = csv_tasks(rows), (lambda t: t)
+        def valid():
+            for n, row in rows:
+                try:
+                    if isinstance(row, Exception): raise row
+                    yield parse(row)
+                except (ValueError, TypeError, KeyError) as e:
+                    prog.reject(n, f"{type(e).__name__}: {e}" if isinstance(e, KeyError) else e, args.strict)
+        it = valid()
+        while True:
+            batch = list(itertools.islice(it, args.batch))
+            if not batch:
+                break
+            write(dict(batch) if args.what == "notes" else batch)
+            prog.ok += len(batch)
+            prog.show()
+    if args.what == "sessions":
+        shared.compact()   # fold the journal / checkpoint the WAL once, not per batch
+    prog.show(end="\n")
+    return 1 if prog.bad else 0
+
+def day_ts(s, end=False):
+    d = dt.date.fromisoformat(s)
+    if end: d += dt.timedelta(days=1)
+    return int(dt.datetime.combine(d, dt.time()).timestamp()) - (1 if end else 0)
+
+def cmd_export(args):
+    fmt = args.format or (guess_format(args.output, None) if args.output not in (None, "-") else "csv")
+    lo = day_ts(args.start) if args.start else 0
+    hi = day_ts(args.end, end=True) if args.end else FOREVER
+    prog = Progress("export sessions", args.quiet)
+    with open_out(args.output) as f:
+        if fmt == "csv":
+            w = csv.writer(f)
+            w.writerow(("start_ts", "end_ts", "type"))
+        for rec in shared.iter_sessions(lo, hi):
+            if fmt == "csv":
+                w.writerow((rec["start_ts"], rec["end_ts"], rec["type"]))
+            else:
+                f.write(json.dumps({"start_ts": rec["start_ts"], "end_ts": rec["end_ts"], "type": rec["type"]}) + "\n")
+            prog.ok += 1
+            if prog.ok % args.batch == 0:
+                prog.show()
+    prog.show(end="\n")
+    return 0
+
+def rewards(s, focus):
+    """coins / xp / sessions_completed as if the history had been earned in the app."""
+    done = [sub["weight"] for t in s.get("tasks", []) for sub in t["subtasks"] if sub["done"]]
+    spent = sum(cost for key, cost in catalog.costs().items() if s["inventory"].get(key))
+    return {
+        "coins": max(0, focus * shared.REWARD_FOCUS_COINS - spent
+                     + sum(int(w * shared.REWARD_SUBTASK_COINS_PER_PCT) for w in done)),
+        "xp": focus * shared.REWARD_FOCUS_XP + sum(int(w * shared.REWARD_SUBTASK_XP_PER_PCT) for w in done),
+        "sessions_completed": focus,
+    }
+
+def cmd_recompute(args):
+    prog = Progress("recompute", args.quiet)
+    focus = 0
+    for rec in shared.iter_sessions(0, FOREVER):
+        focus += rec["type"] == "FOCUS"
+        prog.ok += 1
+        if prog.ok % args.batch == 0:
+            prog.show()
+    prog.show(end="\n")
+    if args.dry_run:
+        s = shared.load()
+        for k, v in rewards(s, focus).items():
+            print(f"{k}: {s[k]} -> {v} (dry run)")
+        return 0
+    with transaction() as s:
+        new = rewards(s, focus)
+        for k, v in new.items():
+            print(f"{k}: {s[k]} -> {v}")
+        s.update(new)
+    return 0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless bulk import/export for FocusForge data")
+    ap.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("import", help="stream sessions, tasks or calendar notes in")
+    p.add_argument("what", choices=sorted(IMPORTERS))
+    p.add_argument("path", help='CSV or JSON Lines file, "-" for stdin')
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.add_argument("--batch", type=int, default=10_000, help="rows per write (default 10000)")
+    p.add_argument("--strict", action="store_true", help="stop at the first bad row")
+    p.set_defaults(fn=cmd_import)
+
+    p = sub.add_parser("export", help="stream sessions out")
+    p.add_argument("what", choices=("sessions",))
+    p.add_argument("--from", dest="start", help="first day, YYYY-MM-DD (default: the beginning)")
+    p.add_argument("--to", dest="end", help="last day, YYYY-MM-DD (default: now)")
+    p.add_argument("-o", "--output", help="file (default stdout, CSV)")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.add_argument("--batch", type=int, default=100_000, help=argparse.SUPPRESS)
+    p.set_defaults(fn=cmd_export)
+
+    p = sub.add_parser("recompute", help="recompute coins, XP and session count from the history")
+    p.add_argument("--dry-run", action="store_true", help="only print what would change")
+    p.add_argument("--batch", type=int, default=100_000, help=argparse.SUPPRESS)
+    p.set_defaults(fn=cmd_recompute)
+
+    args = ap.parse_args(argv)
+    try:
+        return args.fn(args)
+    except BrokenPipeError:   # `cli.py export ... | head`
+        os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
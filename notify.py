@@ -0,0 +1,316 @@
+# notify.py
+"""Push change notification between tk_app.py and the Reward World process.
+
+tk_app.py owns a Hub: a small pub/sub server on a loopback TCP port (plain
+sockets so it behaves the same on Windows). pg_game.py connects to it as a
+Client when started with FOCUSFORGE_HUB=<port> and FOCUSFORGE_HUB_TOKEN=<token>.
+The token is made fresh for each launch and must be the first line a client
+sends; anything else on the port is dropped before it can publish or listen.
+Each change committed through
+shared.py in either process is published once; the hub stamps it with a
+version counter and pushes a {"v": n} line to every connection. Subscribers
+receive the version and skip anything they have already seen.
+
+When there is no hub (pg_game started on its own, or the app went away) the
+channel falls back to polling shared.signature(), which is only a stat() /
+PRAGMA, never a parse.
+
+The same connection doubles as Reward World's control socket. The game
+introduces itself with "hello": "game" next to its token; the hub remembers that connection
+and Hub.command() sends it {"cmd": "show" | "hide" | "quit"} lines, so one
+long-lived game process can be opened, raised, hidden and shut down without
+respawning. A command sent before the game has connected is delivered as soon
+as it says hello.
+"""
+import hmac, json, os, secrets, socket, threading, time
+import shared
+
+HUB_ENV = "FOCUSFORGE_HUB"
+TOKEN_ENV = "FOCUSFORGE_HUB_TOKEN"
+AUTH_TIMEOUT = 5.0   # seconds a new connection gets to present the token
+HOST = "127.0.0.1"
+
+class Channel:
+    """Version counter + subscriber callbacks (called from background threads)."""
+    connected = False   # linked to a hub (Client only)
+
+    def __init__(self):
+        self.version = 0
+        self._subs = []
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._sig = shared.signature()
+        self._watching = False
+
+    def subscribe(self, fn):
+        """fn(version) runs on a background thread after every change."""
+        self._subs.append(fn)
+        return fn
+
+    def on_command(self, fn):
+        """fn(cmd) runs on a background thread for each control command
+        (only a Client connected as a game ever receives any)."""
+        self._handlers.append(fn)
+        return fn
+
+    def _command(self, cmd):
+        for fn in list(self._handlers):
+            try:
+                fn(cmd)
+            except Exception:
+                pass
+
+    def _deliver(self, version):
+        with self._lock:
+            if version <= self.version:
+                return
+            self.version = version
+        for fn in list(self._subs):
+            try:
+                fn(version)
+            except Exception:
+                pass
+
+    def _bump(self):
+        with self._lock:
+            v = self.version + 1
+        self._deliver(v)
+
+    def _local_change(self):
+        # our own commit: remember the new signature so polling doesn't echo it
+        self._sig = shared.signature()
+
+    def watch(self, interval):
+        """Fallback: poll the storage signature every `interval` seconds."""
+        if self._watching:
+            return
+        self._watching = True
+        def loop():
+            while self._watching:
+                time.sleep(interval)
+                try:
+                    sig = shared.signature()
+                except Exception:
+                    continue
+                if sig != self._sig:
+                    self._sig = sig
+                    self.on_external_change()
+        threading.Thread(target=loop, daemon=True).start()
+
+    def on_external_change(self):
+        self._bump()
+
+    def close(self):
+        self._watching = False
+
+class Poller(Channel):
+    """Channel without a hub: local commits + polling."""
+    def __init__(self, interval=1.0):
+        super().__init__()
+        shared.add_listener(self.publish)
+        self.watch(interval)
+
+    def publish(self):
+        self._local_change()
+        self._bump()
+
+    def close(self):
+        super().close()
+        shared.remove_listener(self.publish)
+
+class Hub(Channel):
+    """Runs in tk_app.py; serve() opens the socket other processes connect to."""
+    def __init__(self):
+        super().__init__()
+        self.port = None
+        self.token = secrets.token_hex(16)
+        self._srv = None
+        self._conns = []
+        self._games = []       # connections that said {"hello": "game"}
+        self._pending = None   # last command, replayed to a game that connects later
+        shared.add_listener(self.publish)
+
+    def serve(self):
+        if self._srv is None:
+            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            srv.bind((HOST, 0))
+            srv.listen()
+            self._srv, self.port = srv, srv.getsockname()[1]
+            threading.Thread(target=self._accept, daemon=True).start()
+        return self.port
+
+    def env(self):
+        """Environment entries that let a child process connect."""
+        return {HUB_ENV: str(self.serve()), TOKEN_ENV: self.token}
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._srv.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _auth(self, conn, f):
+        """First line must carry the token; returns it parsed, or None."""
+        conn.settimeout(AUTH_TIMEOUT)
+        try:
+            msg = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        conn.settimeout(None)
+        token = msg.get("token") if isinstance(msg, dict) else None
+        if not isinstance(token, str) or not hmac.compare_digest(token, self.token):
+            return None
+        return msg
+
+    def _read(self, conn):
+        with conn, conn.makefile("rb") as f:
+            first = self._auth(conn, f)
+            if first is None:
+                return
+            with self._lock:
+                self._conns.append(conn)
+                hello = json.dumps({"v": self.version}).encode() + b"\n"
+            try:
+                conn.sendall(hello)
+            except OSError:
+                pass
+            if first.get("hello") == "game":
+                self._game_joined(conn)
+            for line in f:
+                # a client committed something; its data is already on disk
+                self._sig = shared.signature()
+                self.publish(local=False)
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+            if conn in self._games:
+                self._games.remove(conn)
+
+    def _game_joined(self, conn):
+        with self._lock:
+            self._games.append(conn)
+            cmd, self._pending = self._pending, None
+        if cmd:
+            self._send([conn], {"cmd": cmd})
+
+    @property
+    def game_connected(self):
+        return bool(self._games)
+
+    @property
+    def peers(self):
+        """Processes connected right now (Reward World, cli.py, ...)."""
+        return len(self._conns)
+
+    def command(self, cmd):
+        """Send a control command to Reward World. True if a game received it;
+        otherwise it is kept and delivered when a game connects."""
+        with self._lock:
+            games = list(self._games)
+            self._pending = None if games else cmd
+        return self._send(games, {"cmd": cmd}) > 0
+
+    def _send(self, conns, obj):
+        msg = json.dumps(obj).encode() + b"\n"
+        sent = 0
+        for c in conns:
+            try:
+                c.sendall(msg)
+                sent += 1
+            except OSError:
+                pass
+        return sent
+
+    def on_external_change(self):
+        self.publish(local=False)
+
+    def publish(self, local=True):
+        if local:
+            self._local_change()
+        with self._lock:
+            v = self.version + 1
+            conns = list(self._conns)
+        self._send(conns, {"v": v})
+        self._deliver(v)
+
+    def close(self):
+        super().close()
+        shared.remove_listener(self.publish)
+        if self._srv is not None:
+            self._srv.close()
+        for c in list(self._conns):
+            try:
+                c.shutdown(socket.SHUT_RDWR)   # close() alone waits for the reader's makefile
+                c.close()
+            except OSError:
+                pass
+
+class Client(Channel):
+    """Runs in pg_game.py; falls back to polling if the hub goes away.
+
+    With role="game" it registers as the hub's Reward World and receives
+    control commands; handlers also get "detached" once the hub is gone."""
+    def __init__(self, port, token, poll_interval=1.0, role=None):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self._sock = socket.create_connection((HOST, port), timeout=2)
+        self._sock.settimeout(None)
+        hello = {"token": token}
+        if role:
+            hello.update(hello=role, pid=os.getpid())
+        self._sock.sendall(json.dumps(hello).encode() + b"\n")
+        shared.add_listener(self.publish)
+        threading.Thread(target=self._read, daemon=True).start()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def _read(self):
+        try:
+            with self._sock.makefile("rb") as f:
+                for line in f:
+                    try:
+                        msg = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "cmd" in msg:
+                        self._command(msg["cmd"])
+                    elif "v" in msg:
+                        self._sig = shared.signature()
+                        self._deliver(msg["v"])
+        except OSError:
+            pass
+        self._sock = None
+        self.watch(self.poll_interval)
+        self._command("detached")
+
+    def publish(self):
+        self._local_change()
+        sock = self._sock
+        if sock is None:
+            self._bump()
+            return
+        try:
+            sock.sendall(b'{"changed": 1}\n')
+        except OSError:
+            self._bump()
+
+    def close(self):
+        super().close()
+        shared.remove_listener(self.publish)
+        if self._sock is not None:
+            self._sock.close()
+
+def connect(poll_interval=1.0, role=None):
+    """Channel for a child process: the hub named by FOCUSFORGE_HUB (with its
+    token), else polling."""
+    port, token = os.environ.get(HUB_ENV), os.environ.get(TOKEN_ENV)
+    if port and token:
+        try:
+            return Client(int(port), token, poll_interval, role)
+        except (OSError, ValueError):
+            pass
+    return Poller(poll_interval)
@@ -1,72 +1,411 @@
 # pg_game.py
-import pygame, sys
-from shared import load, save
+import math, pygame, sys, time
+from shared import load, transaction
+import catalog, notify
 
 WIDTH, HEIGHT = 640, 400
 BG = (30, 36, 42)
 WHITE = (240, 240, 240)
 BTN = (70, 130, 220)
 BTN2 = (90, 150, 240)
+BTN_OFF = (60, 70, 82)      # can't afford yet
+OWNED = (50, 110, 80)
+GROUND = (40, 90, 60)
+DIM = (150, 160, 170)
+
+ACTIVE_FPS = 60     # while there is input / changes to show
+IDLE_FPS = 4        # otherwise: just enough to keep the stats overlay ticking
+ACTIVE_GRACE = 0.5  # seconds of full rate after the last event
+
+# `python pg_game.py --full` redraws the whole screen every frame (the old
+# behaviour) so it can be compared with the dirty-rect renderer; F3 or
+# --stats toggles the frame-time / CPU overlay.
+FULL_REDRAW = "--full" in sys.argv
+SHOW_STATS = "--stats" in sys.argv
+# --hidden: start without a window (the app pre-warms us this way and sends
+# "show" when the user asks for Reward World)
+START_HIDDEN = "--hidden" in sys.argv
 
 pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.HIDDEN if START_HIDDEN else 0)
 pygame.display.set_caption("Reward World")
 font = pygame.font.SysFont(None, 28)
 big  = pygame.font.SysFont(None, 36)
+small = pygame.font.SysFont(None, 20)
 clock = pygame.time.Clock()
+STATE_CHANGED = pygame.USEREVENT + 1
+CONTROL = pygame.USEREVENT + 2      # show / hide / quit / detached from the app
 
-def txt(t, x, y, f=font, c=WHITE): screen.blit(f.render(t, True, c), (x,y))
-
-class Button:
-    def __init__(self, rect, label, cost, key):
-        self.rect = pygame.Rect(rect); self.label = label; self.cost = cost; self.key = key
-    def draw(self):
-        mouse = pygame.mouse.get_pos()
-        pygame.draw.rect(screen, BTN2 if self.rect.collidepoint(mouse) else BTN, self.rect, border_radius=8)
-        txt(f"{self.label} ({self.cost}c)", self.rect.x+10, self.rect.y+10)
-    def click(self):
-        s = load()
-        if s["coins"] >= self.cost and not s["inventory"].get(self.key, False):
-            s["coins"] -= self.cost
-            s["inventory"][self.key] = True
-            save(s)
+TIP = "Tip: Earn coins by finishing focus sessions in the Timer tab."
+STATS_RECT = pygame.Rect(20, 60, WIDTH-40, 24)
+OVERLAY_RECT = pygame.Rect(WIDTH-190, 8, 182, 48)
+CX, CY = 170, HEIGHT//2 + 30        # avatar centre; the shop grid is on the right
 
-def main():
-    hat = Button((30, 320, 160, 40), "Buy Hat", 30, "hat")
-    pet = Button((210, 320, 200, 40), "Buy Pet Slime", 50, "pet_slime")
+_text_cache = {}
 
-    running = True
-    while running:
-        clock.tick(60)
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                running = False
-            if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
-                if hat.rect.collidepoint(e.pos): hat.click()
-                if pet.rect.collidepoint(e.pos): pet.click()
+def text_surface(t, f=font, c=WHITE):
+    """font.render is the expensive part of a frame; render each string once."""
+    key = (t, id(f), c)
+    surf = _text_cache.get(key)
+    if surf is None:
+        if len(_text_cache) > 512: _text_cache.clear()
+        surf = _text_cache[key] = f.render(t, True, c)
+    return surf
+
+try:
+    from pygame._sdl2.video import Window
+    window = Window.from_display_module()
+except Exception:   # older pygame / unusual builds
+    window = None
+
+def show_window():
+    """Map the window and bring it to the front."""
+    if window is None:
+        pygame.display.set_mode((WIDTH, HEIGHT), pygame.SHOWN)
+        return
+    window.show()
+    window.restore()
+    try:
+        window.focus()
+    except Exception:
+        pass   # some window managers refuse focus stealing; it is shown anyway
+
+def hide_window():
+    if window is None:
+        pygame.display.iconify()
+    else:
+        window.hide()
+
+def txt(t, x, y, f=font, c=WHITE, dest=None): return (dest or screen).blit(text_surface(t, f, c), (x,y))
+
+def render_sprite(spec):
+    """Surface for one catalog sprite (image file or vector shape)."""
+    if "image" in spec:
+        return pygame.image.load(spec["image"]).convert_alpha()
+    color = spec.get("color", WHITE)
+    if "circle" in spec:
+        r = spec["circle"]
+        surf = pygame.Surface((2*r + 1, 2*r + 1), pygame.SRCALPHA)
+        pygame.draw.circle(surf, color, (r, r), r)
+    elif "rect" in spec:
+        surf = pygame.Surface(spec["rect"], pygame.SRCALPHA)
+        surf.fill(color)
+    else:
+        pts = spec["polygon"]
+        surf = pygame.Surface((max(x for x, _ in pts) + 1, max(y for _, y in pts) + 1), pygame.SRCALPHA)
+        pygame.draw.polygon(surf, color, pts)
+    return surf
+
+class Atlas:
+    """Every catalog sprite packed into one texture (shelf packing, tallest
+    first); rects[key] is the sprite's area in it."""
+    def __init__(self, sprites, width=256, pad=1):
+        width = max([width] + [s.get_width() for s in sprites.values()])
+        self.rects = {}
+        x = y = shelf = 0
+        for key in sorted(sprites, key=lambda k: -sprites[k].get_height()):
+            w, h = sprites[key].get_size()
+            if x + w > width:
+                x, y, shelf = 0, y + shelf + pad, 0
+            self.rects[key] = pygame.Rect(x, y, w, h)
+            x += w + pad
+            shelf = max(shelf, h)
+        self.surface = pygame.Surface((width, max(1, y + shelf)), pygame.SRCALPHA).convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        for key, r in self.rects.items():
+            self.surface.blit(sprites[key], r)
+        self._thumbs = {}
+
+    def blit(self, dest, key, pos):
+        dest.blit(self.surface, pos, self.rects[key])
+
+    def thumb(self, key, size):
+        """The sprite scaled down to fit size x size (cached)."""
+        surf = self._thumbs.get(key)
+        if surf is None:
+            r = self.rects[key]
+            scale = min(1.0, size / max(r.w, r.h))
+            surf = self.surface.subsurface(r)
+            if scale < 1.0:
+                surf = pygame.transform.smoothscale(surf, (max(1, int(r.w*scale)), max(1, int(r.h*scale))))
+            self._thumbs[key] = surf
+        return surf
+
+class Shop:
+    """Catalog items in a paginated grid. Cells are found from the pointer
+    position arithmetically, whatever the number of items."""
+    COLS, ROWS = 2, 4
+    CELL_W, CELL_H, GAP = 140, 48, 8
+
+    def __init__(self, items, x=330, y=122):
+        self.items = items
+        self.per_page = self.COLS * self.ROWS
+        self.pages = max(1, math.ceil(len(items) / self.per_page))
+        self.page = 0
+        self.x0, self.y0 = x, y
+        self.rect = pygame.Rect(x, y, self.COLS*(self.CELL_W+self.GAP) - self.GAP,
+                                self.ROWS*(self.CELL_H+self.GAP) - self.GAP)
+        self.nav_rect = pygame.Rect(x, y - 32, self.rect.w, 24)
+        self.prev_rect = pygame.Rect(self.nav_rect.right - 60, self.nav_rect.y, 26, 24)
+        self.next_rect = pygame.Rect(self.nav_rect.right - 26, self.nav_rect.y, 26, 24)
+
+    def visible(self):
+        """Item indexes on the current page."""
+        first = self.page * self.per_page
+        return range(first, min(len(self.items), first + self.per_page))
+
+    def cell_rect(self, i):
+        row, col = divmod(i - self.page * self.per_page, self.COLS)
+        return pygame.Rect(self.x0 + col*(self.CELL_W+self.GAP), self.y0 + row*(self.CELL_H+self.GAP),
+                           self.CELL_W, self.CELL_H)
+
+    def cell_at(self, pos):
+        """Index of the item under pos, or None (gaps and empty cells included)."""
+        x, y = pos[0] - self.x0, pos[1] - self.y0
+        if x < 0 or y < 0: return None
+        col, cx = divmod(x, self.CELL_W + self.GAP)
+        row, cy = divmod(y, self.CELL_H + self.GAP)
+        if col >= self.COLS or row >= self.ROWS or cx >= self.CELL_W or cy >= self.CELL_H:
+            return None
+        i = self.page * self.per_page + row * self.COLS + col
+        return i if i < len(self.items) else None
+
+    def turn(self, delta):
+        page = min(self.pages - 1, max(0, self.page + delta))
+        changed, self.page = page != self.page, page
+        return changed
 
-        s = load()
-        screen.fill(BG)
-        txt("Reward World", 20, 20, big)
-        txt(f"Coins: {s['coins']}   XP: {s['xp']}   Sessions: {s['sessions_completed']}", 20, 60)
+def buy(item):
+    with transaction() as s:
+        if s["coins"] >= item.cost and not s["inventory"].get(item.key, False):
+            s["coins"] -= item.cost
+            s["inventory"][item.key] = True
 
-        # Avatar
-        cx, cy = WIDTH//2, HEIGHT//2 + 30
-        pygame.draw.circle(screen, (220,200,140), (cx, cy), 28)
-        if s["inventory"].get("hat"):
-            pygame.draw.polygon(screen, (180,60,60), [(cx-32, cy-8), (cx+32, cy-8), (cx, cy-44)])
-        if s["inventory"].get("pet_slime"):
-            pygame.draw.circle(screen, (90,200,120), (cx+50, cy+20), 12)
+def build_shop(path=None):
+    """(Shop, Atlas, worn-order item list) for the catalog, sprites rendered once."""
+    items = catalog.load(path)
+    atlas = Atlas({it.key: render_sprite(it.sprite) for it in items})
+    return Shop([it for it in items if not it.worn]), atlas, sorted(items, key=lambda it: it.layer)
 
-        # Ground
-        pygame.draw.rect(screen, (40, 90, 60), (0, HEIGHT-40, WIDTH, 40))
+def build_static():
+    """Background, title, ground and tip line: drawn once, blitted back as needed."""
+    layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+    layer.fill(BG)
+    txt("Reward World", 20, 20, big, dest=layer)
+    pygame.draw.rect(layer, GROUND, (0, HEIGHT-40, WIDTH, 40))
+    txt(TIP, 20, HEIGHT-28, dest=layer)
+    return layer
 
-        # Shop
-        hat.draw(); pet.draw()
-        txt("Tip: Earn coins by finishing focus sessions in the Timer tab.", 20, HEIGHT-28)
+class Renderer:
+    """Redraws only the regions whose content changed and updates just those rects."""
+    def __init__(self, shop, atlas, layers):
+        self.static = build_static()
+        self.shop, self.atlas, self.layers = shop, atlas, layers
+        # the avatar area: every layer at its offset from the centre
+        rects = [pygame.Rect(CX + it.offset[0], CY + it.offset[1], *atlas.rects[it.key].size) for it in layers]
+        self.avatar_rect = rects[0].unionall(rects[1:]) if rects else pygame.Rect(CX, CY, 0, 0)
+        self.src = None
+        self.hover = None
+        self.dirty = []
+        self.invalidate()
+
+    def invalidate(self):
+        screen.blit(self.static, (0, 0))
+        self.dirty = [screen.get_rect()]
+        self.stats_line = self.avatar = self.overlay = self.page_look = None
+        self.nav()
+        if self.src is not None:
+            self.state(self.src)
+
+    def _restore(self, rect):
+        screen.blit(self.static, rect, rect)
+        self.dirty.append(rect)
+
+    def state(self, s):
+        """Call when s was (re)loaded: redraws what depends on it."""
+        self.src = s
+        line = f"Coins: {s['coins']}   XP: {s['xp']}   Sessions: {s['sessions_completed']}"
+        if line != self.stats_line:
+            self.stats_line = line
+            self._restore(STATS_RECT)
+            txt(line, STATS_RECT.x, STATS_RECT.y)
+        inv = s["inventory"]
+        worn = tuple(it.key for it in self.layers if it.worn or inv.get(it.key))
+        if worn != self.avatar:
+            self.avatar = worn
+            self._restore(self.avatar_rect)
+            screen.blit(self.compose(worn), self.avatar_rect)
+        self.page()
+
+    def compose(self, keys):
+        """The avatar from cached atlas sprites, in layer order."""
+        surf = pygame.Surface(self.avatar_rect.size, pygame.SRCALPHA)
+        x0, y0 = self.avatar_rect.x - CX, self.avatar_rect.y - CY
+        offsets = {it.key: it.offset for it in self.layers}
+        for key in keys:
+            dx, dy = offsets[key]
+            self.atlas.blit(surf, key, (dx - x0, dy - y0))
+        return surf
+
+    def page(self):
+        """Redraw the visible cells if any changed owned / affordable."""
+        if self.src is None: return
+        inv, coins = self.src["inventory"], self.src["coins"]
+        look = (self.shop.page,) + tuple((bool(inv.get(self.shop.items[i].key)), coins >= self.shop.items[i].cost)
+                                         for i in self.shop.visible())
+        if look == self.page_look: return
+        self.page_look = look
+        self._restore(self.shop.rect)
+        for i in self.shop.visible():
+            self.cell(i)
+
+    def cell(self, i):
+        it, rect = self.shop.items[i], self.shop.cell_rect(i)
+        owned = bool(self.src["inventory"].get(it.key))
+        if owned: color = OWNED
+        elif self.src["coins"] < it.cost: color = BTN_OFF
+        else: color = BTN2 if i == self.hover else BTN
+        self._restore(rect)
+        pygame.draw.rect(screen, color, rect, border_radius=8)
+        th = self.atlas.thumb(it.key, self.shop.CELL_H - 10)
+        screen.blit(th, th.get_rect(center=(rect.x + 26, rect.centery)))
+        txt(it.name, rect.x + 52, rect.y + 8, small)
+        txt("owned" if owned else f"{it.cost}c", rect.x + 52, rect.y + 26, small, DIM if owned else WHITE)
+
+    def nav(self):
+        sh = self.shop
+        self._restore(sh.nav_rect)
+        txt("Shop", sh.nav_rect.x, sh.nav_rect.y + 2, font)
+        txt(f"{sh.page + 1}/{sh.pages}", sh.prev_rect.x - 40, sh.nav_rect.y + 5, small, DIM)
+        for r, label in ((sh.prev_rect, "<"), (sh.next_rect, ">")):
+            pygame.draw.rect(screen, BTN, r, border_radius=6)
+            txt(label, r.x + 8, r.y + 3)
+
+    def turn(self, delta):
+        if self.shop.turn(delta):
+            self.hover = None
+            self.nav()
+            self.page()
+
+    def pointer(self, pos):
+        h = self.shop.cell_at(pos)
+        if h != self.hover:
+            old, self.hover = self.hover, h
+            if self.src is not None:
+                for i in (old, h):
+                    if i is not None: self.cell(i)
+
+    def stats(self, lines):
+        if lines == self.overlay: return
+        self.overlay = lines
+        self._restore(OVERLAY_RECT)
+        if lines is None: return
+        pygame.draw.rect(screen, (0, 0, 0), OVERLAY_RECT)
+        for i, l in enumerate(lines):
+            txt(l, OVERLAY_RECT.x+6, OVERLAY_RECT.y+5+i*14, small, DIM)
+
+    def flush(self):
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+
+class FrameStats:
+    """Frame time of the last frame and process CPU% over ~1 s windows."""
+    def __init__(self):
+        self.frames = 0; self.work = 0.0; self.cpu = 0.0; self.fps = 0.0
+        self.t0, self.c0 = time.perf_counter(), time.process_time()
+    def frame(self, seconds):
+        self.frames += 1; self.work = seconds
+        now = time.perf_counter()
+        if now - self.t0 >= 1.0:
+            self.cpu = 100.0 * (time.process_time() - self.c0) / (now - self.t0)
+            self.fps = self.frames / (now - self.t0)
+            self.frames = 0; self.t0, self.c0 = now, time.process_time()
+    def lines(self):
+        return (f"frame {self.work*1000:.2f} ms  {self.fps:.0f} fps",
+                f"cpu {self.cpu:.1f}%  {'full' if FULL_REDRAW else 'dirty'}",
+                f"texts cached {len(_text_cache)}")
+
+def main():
+    shop, atlas, layers = build_shop()
+
+    # reload only when the other process (or a click here) changed something
+    chan = notify.connect(role="game")
+    chan.subscribe(lambda v: pygame.event.post(pygame.event.Event(STATE_CHANGED, version=v)))
+    chan.on_command(lambda cmd: pygame.event.post(pygame.event.Event(CONTROL, cmd=cmd)))
+    seen = chan.version
+    s = load()
+    hidden = START_HIDDEN
+
+    r = Renderer(shop, atlas, layers)
+    r.state(s)
+    r.pointer(pygame.mouse.get_pos())
+    fs = FrameStats()
+    show_stats = SHOW_STATS
+    last_active = time.monotonic()
+
+    # a hidden instance that couldn't reach the app could never be shown
+    running = not (hidden and not chan.connected)
+    while running:
+        if hidden:
+            # nothing to draw: sleep until the app (or a state change) wakes us
+            events = [pygame.event.wait()] + pygame.event.get()
+        elif FULL_REDRAW or time.monotonic() - last_active < ACTIVE_GRACE:
+            clock.tick(ACTIVE_FPS)
+            events = pygame.event.get()
+        else:
+            # idle: sleep in SDL until input, a state change or the idle tick
+            events = [pygame.event.wait(1000 // IDLE_FPS)] + pygame.event.get()
+        t0 = time.perf_counter()
+        for e in events:
+            if e.type == pygame.NOEVENT:
+                continue
+            last_active = time.monotonic()
+            if e.type == pygame.QUIT:
+                if chan.connected:
+                    # started by the app: stay warm for the next open, the app shuts us down
+                    hide_window(); hidden = True
+                else:
+                    running = False
+            if e.type == CONTROL:
+                if e.cmd == "show":
+                    show_window(); hidden = False
+                    r.invalidate()
+                elif e.cmd == "hide":
+                    hide_window(); hidden = True
+                elif e.cmd == "quit" or (e.cmd == "detached" and hidden):
+                    running = False   # nobody left to show a hidden window
+            if e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                show_stats = not show_stats
+            if e.type == pygame.MOUSEMOTION:
+                r.pointer(e.pos)
+            if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                i = shop.cell_at(e.pos)
+                if i is not None:
+                    buy(shop.items[i]); s = None
+                elif shop.prev_rect.collidepoint(e.pos): r.turn(-1)
+                elif shop.next_rect.collidepoint(e.pos): r.turn(1)
+            if e.type == pygame.MOUSEWHEEL:
+                r.turn(-e.y)
+            if e.type == STATE_CHANGED and e.version > seen:
+                seen = e.version
+                s = None   # reloaded when next drawn
+            if e.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                r.invalidate()
 
-        pygame.display.flip()
+        if hidden:
+            continue
+        if s is None:
+            s = load()
+            r.state(s)
+        if FULL_REDRAW:
+            r.invalidate()
+            r.pointer(pygame.mouse.get_pos())
+        r.stats(fs.lines() if show_stats else None)
+        r.flush()
+        fs.frame(time.perf_counter() - t0)
 
+    chan.close()
     pygame.quit(); sys.exit()
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+# profiling.py
+"""Opt-in instrumentation for the hot paths.
+
+Start the app with FOCUSFORGE_PROFILE=1 to record, per wrapped function,
+call counts and a latency histogram, and per file, bytes read and written.
+Without it timed() returns the function unchanged and the I/O hooks sit
+behind `if profiling.ENABLED`, so the cost is nil.
+
+    @profiling.timed("shared.load")
+    def load(): ...
+
+    if profiling.ENABLED: profiling.io("data.json", read=len(raw))
+
+capture(seconds, path) runs cProfile over the calling thread (the Tk main
+loop) for the next N seconds and dumps a .prof file for pstats/snakeviz.
+"""
+import bisect, cProfile, functools, os, threading, time
+
+ENABLED = os.environ.get("FOCUSFORGE_PROFILE", "") not in ("", "0")
+
+# histogram bucket upper bounds in ms; the last bucket is everything slower
+BUCKETS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+class Metric:
+    __slots__ = ("calls", "total", "max", "hist")
+    def __init__(self):
+        self.calls, self.total, self.max = 0, 0.0, 0.0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.calls += 1; self.total += ms
+        if ms > self.max: self.max = ms
+        self.hist[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, q):
+        """Upper bound (ms) of the bucket holding the q-th quantile."""
+        if not self.calls: return 0.0
+        want, seen = q * self.calls, 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= want:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+metrics = {}                  # name -> Metric
+io_bytes = {}                 # file kind -> [read, written]
+
+def timed(name):
+    """Decorator recording calls/latency of fn under `name` (identity when off)."""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        m = metrics.setdefault(name, Metric())
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **kw)
+            finally:
+                m.add(time.perf_counter() - t0)
+        return inner
+    return wrap
+
+def io(kind, read=0, written=0):
+    acc = io_bytes.setdefault(kind, [0, 0])
+    acc[0] += read; acc[1] += written
+
+def snapshot():
+    """Plain-data copy of the metrics for display / logging."""
+    return {
+        "calls": {name: {"calls": m.calls, "mean_ms": m.total / m.calls if m.calls else 0.0,
+                         "p50_ms": m.percentile(0.5), "p95_ms": m.percentile(0.95),
+                         "max_ms": m.max, "hist": list(m.hist)}
+                  for name, m in sorted(metrics.items())},
+        "io": {k: {"read": r, "written": w} for k, (r, w) in sorted(io_bytes.items())},
+    }
+
+def reset():
+    for m in metrics.values():
+        m.__init__()
+    io_bytes.clear()
+
+_capture = {"prof": None}
+_capture_lock = threading.Lock()
+
+def capture_start():
+    """Start profiling the calling thread; False if a capture is running."""
+    with _capture_lock:
+        if _capture["prof"] is not None:
+            return False
+        _capture["prof"] = cProfile.Profile()
+        _capture["prof"].enable()
+        return True
+
+def capture_stop(path):
+    with _capture_lock:
+        prof, _capture["prof"] = _capture["prof"], None
+    if prof is None:
+        return None
+    prof.disable()
+    prof.dump_stats(path)
+    return path
+
+def capture(seconds, path, after, on_done=None):
+    """Profile the next `seconds` and dump to `path`. `after` is Tk's after(),
+    so the capture starts and stops on the thread running the event loop."""
+    if not capture_start():
+        return False
+    def stop():
+        capture_stop(path)
+        if on_done: on_done(path)
+    after(int(seconds * 1000), stop)
+    return True
@@ -0,0 +1,138 @@
+# serializers.py
+"""File formats for the data.json snapshot.
+
+    pretty    indented JSON (what data.json used to be)
+    json      compact JSON, the default; parsed/written with orjson when it
+              is installed (`pip install orjson`)
+    msgpack   binary, needs `pip install msgpack`
+    marshal   binary, stdlib marshal of plain dicts/lists/str/numbers
+
+The format is detected from the file itself on load, so files in any of them
+can be read and a converted file keeps its format on later saves. Binary files
+start with a 4-byte magic; anything else is JSON. The session journal and the
+monthly archive stay JSON lines (they are appended to line by line).
+
+    python serializers.py convert msgpack [data.json]   # rewrite in another format
+    python serializers.py bench [10000,100000,1000000]  # size and load/save times
+"""
+import json, marshal, os, sys, time
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGIC = {"msgpack": b"\x89FFm", "marshal": b"\x89FFr"}
+FORMATS = ("pretty", "json", "msgpack", "marshal")
+USE_ORJSON = orjson is not None and os.environ.get("FOCUSFORGE_ORJSON", "1") != "0"
+
+def detect(data):
+    """Format name of serialized bytes."""
+    for name, magic in MAGIC.items():
+        if data.startswith(magic):
+            return name
+    return "pretty" if data[:2] in (b"{\n", b"{\r") else "json"
+
+def available(name):
+    return name in FORMATS and (name != "msgpack" or msgpack is not None)
+
+def dumps(doc, fmt="json"):
+    if fmt == "json":
+        if USE_ORJSON:
+            return orjson.dumps(doc)
+        return json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if fmt == "pretty":
+        if USE_ORJSON:
+            return orjson.dumps(doc, option=orjson.OPT_INDENT_2)
+        return json.dumps(doc, indent=2).encode("utf-8")
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("the msgpack format needs `pip install msgpack`")
+        return MAGIC["msgpack"] + msgpack.packb(doc, use_bin_type=True)
+    if fmt == "marshal":
+        return MAGIC["marshal"] + marshal.dumps(doc, 4)
+    raise ValueError(f"unknown format {fmt!r}; pick one of {FORMATS}")
+
+def loads(data):
+    fmt = detect(data)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("this file is msgpack; `pip install msgpack` or convert it "
+                               "on a machine that has it: python serializers.py convert json")
+        return msgpack.unpackb(data[len(MAGIC["msgpack"]):], raw=False, strict_map_key=False)
+    if fmt == "marshal":
+        return marshal.loads(data[len(MAGIC["marshal"]):])
+    return orjson.loads(data) if USE_ORJSON else json.loads(data.decode("utf-8"))
+
+# ---------- benchmark
+
+def _sample_state(n, seed=7):
+    import random
+    rng = random.Random(seed)
+    t = 1_700_000_000
+    sessions = []
+    for _ in range(n):
+        t += rng.randint(600, 7200)
+        kind = rng.choice(("FOCUS", "FOCUS", "SHORT", "LONG"))
+        sessions.append({"start_ts": t, "end_ts": t + rng.choice((1500, 300, 900)), "type": kind})
+    return {"coins": 1234, "xp": 5678, "sessions_completed": n,
+            "options": {"focus_minutes": 25, "short_break_minutes": 5, "long_break_minutes": 15,
+                        "long_after_n_focus": 2, "sound_enabled": True},
+            "inventory": {"hat": True, "pet_slime": False},
+            "tasks": [{"id": i, "title": f"Task {i}", "subtasks": [
+                {"id": 1000 + j, "title": f"Step {j}", "weight": 25, "done": j % 2 == 0} for j in range(4)]}
+                for i in range(50)],
+            "calendar": {f"2024-01-{d:02d}": {"title": "Note", "color": "#3498db", "note": ""} for d in range(1, 29)},
+            "sessions": sessions, "journal_gen": 3}
+
+def bench(sizes=(10_000, 100_000, 1_000_000), path=None):
+    import tempfile
+    path = path or os.path.join(tempfile.gettempdir(), "focusforge-serializer-bench")
+    rows = []
+    for n in sizes:
+        doc = _sample_state(n)
+        repeat = 3 if n <= 100_000 else 1
+        for fmt in FORMATS:
+            if not available(fmt):
+                continue
+            save = load = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                with open(path, "wb") as f:
+                    f.write(dumps(doc, fmt))
+                    f.flush(); os.fsync(f.fileno())
+                t1 = time.perf_counter()
+                with open(path, "rb") as f:
+                    back = loads(f.read())
+                t2 = time.perf_counter()
+                save, load = min(save, t1 - t0), min(load, t2 - t1)
+            assert back == doc, fmt
+            rows.append((n, fmt, os.path.getsize(path), save, load))
+    os.remove(path)
+    return rows
+
+def main(argv):
+    if argv[:1] == ["convert"] and len(argv) >= 2:
+        import shared
+        if len(argv) > 2:
+            shared.DATA_PATH = os.path.abspath(argv[2])
+        before = os.path.getsize(shared.DATA_PATH) if os.path.exists(shared.DATA_PATH) else 0
+        old = shared.convert(argv[1])
+        print(f"{shared.DATA_PATH}: {old} ({before:,} bytes) -> {argv[1]} "
+              f"({os.path.getsize(shared.DATA_PATH):,} bytes)")
+    elif argv[:1] == ["bench"]:
+        sizes = [int(x) for x in argv[1].split(",")] if len(argv) > 1 else (10_000, 100_000, 1_000_000)
+        print(f"orjson: {'yes' if USE_ORJSON else 'no'}   msgpack: {'yes' if msgpack else 'no'}")
+        print(f"{'sessions':>9} {'format':>8} {'size':>13} {'save ms':>9} {'load ms':>9}")
+        for n, fmt, size, save, load in bench(sizes):
+            print(f"{n:>9,} {fmt:>8} {size:>13,} {save*1000:>9.1f} {load*1000:>9.1f}")
+    else:
+        print(f"usage: serializers.py convert {{{','.join(FORMATS)}}} [data.json]\n"
+              f"       serializers.py bench [10000,100000,1000000]")
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
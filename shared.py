@@ -1,9 +1,35 @@
 # shared.py
-import json, os, threading, time
+import json, os, threading, time, copy, contextlib, collections, heapq, atexit
+import datetime as dt
+import serializers, profiling
+try:
+    import fcntl
+except ImportError:          # Windows
+    fcntl = None
+    import msvcrt
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), "data.json")
 _LOCK = threading.Lock()
 
+# Storage backend: "json" (data.json + session journal, the default) or
+# "sqlite" (data.db, see sqlite_store.py). Pick it with FOCUSFORGE_BACKEND
+# or use_backend(); move existing data over with `python sqlite_store.py`.
+BACKEND = os.environ.get("FOCUSFORGE_BACKEND", "json")
+
+# data.json format (see serializers.py). Unset: keep whatever format the file
+# is in (compact JSON for new files); rewrite with `python serializers.py convert`.
+FORMAT = os.environ.get("FOCUSFORGE_FORMAT")
+
+# fsync data.json and the journal on every write; set_durability("fast")
+# turns it off (the rename is still atomic, an OS crash may lose the write)
+FSYNC = True
+
+# rewards (the Pomodoro/Tasks tabs pay these; `cli.py recompute` replays them)
+REWARD_FOCUS_COINS = 10
+REWARD_FOCUS_XP    = 15
+REWARD_SUBTASK_COINS_PER_PCT = 0.1   # e.g., weight 20% -> 2 coins
+REWARD_SUBTASK_XP_PER_PCT    = 0.15  # e.g., weight 20% -> 3 xp
+
 DEFAULTS = {
     "coins": 0,
     "xp": 0,
@@ -14,41 +40,1037 @@ DEFAULTS = {
         "long_break_minutes": 15,
         "long_after_n_focus": 2,
         "sound_enabled": True,
+        "prewarm_world": False,   # start Reward World hidden with the app
+        "durability": "balanced", # see set_durability()
     },
-    "inventory": {"hat": False, "pet_slime": False},
+    "inventory": {},   # catalog item key -> True once bought (see catalog.json)
     "tasks": [],       # list of {id, title, subtasks:[{id,title,weight,done}]}
+    "events": [],      # recurring / multi-day events, see calendar_events.py
     "calendar": {},    # "YYYY-MM-DD": {"title": "...", "color": "#RRGGBB", "note": "..."}
     "sessions": []     # list of {start_ts, end_ts, type}  type in {"FOCUS","SHORT","LONG"}
 }
 
+# ---------- daily rollups
+# Reports read per-day totals instead of walking every session. A day is the
+# local date of start_ts; its totals are
+#   {"FOCUS": secs, "SHORT": secs, "LONG": secs, "FOCUS_n": n, "SHORT_n": n, "LONG_n": n}
+# Backends update them as sessions are appended.
+
+KINDS = ("FOCUS", "SHORT", "LONG")
+
+def day_key(ts):
+    return dt.date.fromtimestamp(ts).isoformat()
+
+def empty_day():
+    return {"FOCUS": 0, "SHORT": 0, "LONG": 0, "FOCUS_n": 0, "SHORT_n": 0, "LONG_n": 0}
+
+def add_to_daily(daily, rec):
+    k = day_key(rec["start_ts"])
+    d = daily.get(k)
+    if d is None:
+        d = daily[k] = empty_day()
+    d[rec["type"]] += max(0, rec["end_ts"] - rec["start_ts"])
+    d[rec["type"] + "_n"] += 1
+
+def build_daily(sessions):
+    daily = {}
+    for rec in sessions:
+        add_to_daily(daily, rec)
+    return daily
+
+def iter_days(first_day, last_day):
+    d = first_day
+    while d <= last_day:
+        yield d.isoformat()
+        d += dt.timedelta(days=1)
+
+def merge_daily(into, other):
+    for k, d in other.items():
+        cur = into.get(k)
+        if cur is None:
+            into[k] = dict(d)
+        else:
+            for f in cur: cur[f] += d.get(f, 0)
+    return into
+
+# ---------- JSON backend: monthly session archive
+# Only the current month's sessions live in data.json (+ journal). When the
+# journal is folded, sessions from earlier months are appended to per-month
+# partitions <data>.archive/YYYY-MM.jsonl and recorded in manifest.json
+# (per-month count, committed byte length and daily rollups). Partitions are
+# read only when a report needs them, through an LRU with a memory cap.
+#
+# The manifest is the commit point: bytes past a partition's recorded length
+# are leftovers of an interrupted fold and are ignored/truncated. If data.json
+# was not rewritten after the manifest (manifest "gen" ahead of
+# "journal_gen"), sessions older than the manifest's "cutoff" month are
+# already archived and are dropped from the live list on load.
+
+ARCHIVE_CACHE_BYTES = 32 * 1024 * 1024   # LRU cap for loaded partitions
+SESSION_BYTES = 400                       # rough in-memory size of one session dict
+
+def month_key(ts):
+    return dt.date.fromtimestamp(ts).strftime("%Y-%m")
+
+def archive_path():
+    return os.path.splitext(DATA_PATH)[0] + ".archive"
+
+class Archive:
+    """Closed months of sessions, loaded lazily."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.lru = collections.OrderedDict()   # month -> (bytes, rows)
+        self.lru_bytes = 0
+        self.sig = None
+        self.manifest = {"gen": 0, "cutoff": None, "months": {}}
+        self.refresh()
+
+    def _manifest_path(self):
+        return os.path.join(self.path, "manifest.json")
+
+    def refresh(self):
+        """Re-read the manifest if another process changed it."""
+        with self.lock:
+            sig = _stat_sig(self._manifest_path())
+            if sig == self.sig:
+                return
+            self.sig = sig
+            if sig is None:
+                self.manifest = {"gen": 0, "cutoff": None, "months": {}}
+            else:
+                with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            for m in list(self.lru):
+                info = self.manifest["months"].get(m)
+                if info is None or info["bytes"] != self.lru[m][0]:
+                    self._evict(m)
+
+    @property
+    def gen(self): return self.manifest.get("gen", 0)
+    @property
+    def cutoff(self): return self.manifest.get("cutoff")
+
+    def months(self):
+        return sorted(self.manifest["months"])
+
+    def __len__(self):
+        return sum(m["count"] for m in self.manifest["months"].values())
+
+    def count(self, month):
+        return self.manifest["months"][month]["count"]
+
+    def daily(self):
+        out = {}
+        for info in self.manifest["months"].values():
+            merge_daily(out, info["daily"])
+        return out
+
+    def _evict(self, month):
+        size, rows = self.lru.pop(month)
+        self.lru_bytes -= len(rows) * SESSION_BYTES
+
+    def rows(self, month, cache=True):
+        """Sessions of one archived month in file order. cache=False reads
+        without keeping the month in the LRU (one-pass scans)."""
+        with self.lock:
+            info = self.manifest["months"][month]
+            hit = self.lru.get(month)
+            if hit is not None and hit[0] == info["bytes"]:
+                self.lru.move_to_end(month)
+                return hit[1]
+            rows = []
+            with open(os.path.join(self.path, month + ".jsonl"), "rb") as f:
+                data = f.read(info["bytes"])
+            if profiling.ENABLED: profiling.io("archive", read=len(data))
+            for raw in data.splitlines():
+                try:
+                    rows.append(json.loads(raw))
+                except ValueError:
+                    continue
+            if not cache:
+                return rows
+            if month in self.lru:
+                self._evict(month)
+            self.lru[month] = (info["bytes"], rows)
+            self.lru_bytes += len(rows) * SESSION_BYTES
+            while self.lru_bytes > ARCHIVE_CACHE_BYTES and len(self.lru) > 1:
+                self._evict(next(iter(self.lru)))
+            return rows
+
+    def months_between(self, start_ts, end_ts):
+        lo, hi = month_key(start_ts), month_key(end_ts)
+        return [m for m in self.months() if lo <= m <= hi]
+
+    def add(self, recs, gen, cutoff):
+        """Append recs to their month partitions, then commit the manifest."""
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            by_month = {}
+            for rec in recs:
+                by_month.setdefault(month_key(rec["start_ts"]), []).append(rec)
+            months = self.manifest["months"]
+            for m, rows in by_month.items():
+                info = months.setdefault(m, {"count": 0, "bytes": 0, "daily": {}})
+                with open(os.path.join(self.path, m + ".jsonl"), "a+b") as f:
+                    f.truncate(info["bytes"])   # drop bytes of an interrupted fold
+                    f.write(b"".join(json.dumps(r).encode() + b"\n" for r in rows))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    if profiling.ENABLED: profiling.io("archive", written=f.tell() - info["bytes"])
+                    info["bytes"] = f.tell()
+                info["count"] += len(rows)
+                merge_daily(info["daily"], build_daily(rows))
+            self.manifest["gen"], self.manifest["cutoff"] = gen, cutoff
+            self._write_manifest()
+            for m in by_month:
+                if m in self.lru: self._evict(m)
+
+    def _write_manifest(self):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp, self._manifest_path())
+        self.sig = _stat_sig(self._manifest_path())
+
+    def rebuild_daily(self):
+        """Recount every partition and recompute its rollups from the rows
+        within its committed length (after archived sessions were edited or
+        repaired in place)."""
+        with self.lock:
+            months = self.manifest["months"]
+            if not months:
+                return
+            for m in list(self.lru):
+                self._evict(m)
+            for m, info in months.items():
+                rows = self.rows(m, cache=False)
+                info["count"], info["daily"] = len(rows), build_daily(rows)
+            self._write_manifest()
+
+    def clear(self):
+        with self.lock:
+            for m in self.months():
+                try:
+                    os.remove(os.path.join(self.path, m + ".jsonl"))
+                except FileNotFoundError:
+                    pass
+            try:
+                os.remove(self._manifest_path())
+            except FileNotFoundError:
+                pass
+            self.lru.clear(); self.lru_bytes = 0
+            self.sig = None
+            self.manifest = {"gen": 0, "cutoff": None, "months": {}}
+
+class SessionLog:
+    """state["sessions"] for the JSON backend: archived months, loaded on
+    demand, followed by the live (current month) list. Supports the list
+    operations callers use: len, iteration, indexing/slicing and append."""
+    def __init__(self, archive, live):
+        self.archive = archive
+        self.live = live
+
+    def __len__(self):
+        return len(self.archive) + len(self.live)
+
+    def __iter__(self):
+        for m in self.archive.months():
+            yield from self.archive.rows(m)
+        yield from self.live
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return list(self)[i]
+            out, pos = [], 0
+            for m in self.archive.months():
+                n = self.archive.count(m)
+                if pos + n > start and pos < stop:
+                    rows = self.archive.rows(m)
+                    out.extend(rows[max(0, start-pos):stop-pos])
+                pos += n
+            out.extend(self.live[max(0, start-pos):max(0, stop-pos)])
+            return out
+        n = len(self)
+        if i < 0: i += n
+        if not 0 <= i < n: raise IndexError(i)
+        return self[i:i+1][0]
+
+    def append(self, rec):
+        self.live.append(rec)
+
+    def extend(self, recs):
+        self.live.extend(recs)
+
+    def between(self, start_ts, end_ts):
+        out = []
+        for m in self.archive.months_between(start_ts, end_ts):
+            out.extend(x for x in self.archive.rows(m) if start_ts <= x["start_ts"] <= end_ts)
+        out.extend(x for x in self.live if start_ts <= x["start_ts"] <= end_ts)
+        out.sort(key=lambda x: x["start_ts"])
+        return out
+
+_archives = {}
+
+def _archive():
+    path = archive_path()
+    a = _archives.get(path)
+    if a is None:
+        a = _archives[path] = Archive(path)
+    return a
+
+# ---------- JSON backend: in-process cache + session journal
+# load() hands out the parsed state it keeps in memory and only re-parses
+# data.json when the file's (mtime, size, inode) signature changes, i.e. when
+# another process wrote it. The returned dict is shared within the process:
+# mutate it only if you are going to save() it.
+#
+# Completed sessions are not written into data.json directly: append_session
+# adds one line to a JSON Lines journal next to it (data.sessions.jsonl) and
+# load() merges the journal into state["sessions"]. The journal starts with a
+# {"journal": gen} header; data.json records the generation it expects in
+# "journal_gen", so a journal that was already folded into the snapshot (e.g.
+# a crash between the two steps of compact()) is simply ignored.
+
+JOURNAL_COMPACT_AT = 200   # save() folds the journal once it holds this many sessions
+
+_cache = {"sig": None, "state": None, "gen": 0, "snap_n": 0, "journal_n": 0, "daily": None,
+          "refold": False, "fmt": None}
+_stats = {"hits": 0, "misses": 0}
+
+def _sig(st):
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _stat_sig(path):
+    try:
+        return _sig(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+def journal_path():
+    return os.path.splitext(DATA_PATH)[0] + ".sessions.jsonl"
+
+def _disk_sig():
+    return (_stat_sig(DATA_PATH), _stat_sig(journal_path()),
+            _stat_sig(os.path.join(archive_path(), "manifest.json")))
+
+def _json_invalidate():
+    with _LOCK:
+        _cache["sig"] = _cache["state"] = None
+
+def cache_stats():
+    """{"hits": n, "misses": n} for load() since start (or the last reset)."""
+    with _LOCK:
+        return dict(_stats)
+
+def reset_cache_stats():
+    with _LOCK:
+        _stats["hits"] = _stats["misses"] = 0
+
+def read_journal(path=None):
+    """Return (gen, sessions) from a journal file.
+
+    A last line without its newline is a torn write from a crash and is
+    skipped, as is any other line that does not parse."""
+    gen, out = None, []
+    try:
+        f = open(path or journal_path(), "rb")
+    except FileNotFoundError:
+        return gen, out
+    with f:
+        for raw in f:
+            if profiling.ENABLED: profiling.io("journal", read=len(raw))
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue
+            if gen is None and "journal" in rec:
+                gen = rec["journal"]
+            elif "start_ts" in rec:
+                out.append(rec)
+    return gen, out
+
 def _ensure():
     if not os.path.exists(DATA_PATH):
-        save(DEFAULTS)
+        state = copy.deepcopy(DEFAULTS)
+        state["sessions"] = SessionLog(_archive(), [])
+        _json_save(state)
 
-def load():
+def _json_load():
     _ensure()
     with _LOCK:
-        with open(DATA_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        sig = _disk_sig()
+        if _cache["sig"] is not None and _cache["sig"] == sig:
+            _stats["hits"] += 1
+            return _cache["state"]
+        _stats["misses"] += 1
+        with open(DATA_PATH, "rb") as f:
+            # stat the handle we read from: if the file is replaced while we
+            # parse, the next load() sees a different signature and re-reads
+            dsig = _sig(os.fstat(f.fileno()))
+            raw = f.read()
+        if profiling.ENABLED: profiling.io("data.json", read=len(raw))
+        state = serializers.loads(raw)
+        _cache["fmt"] = serializers.detect(raw)
+        gen = state.pop("journal_gen", 0)
+        live = state.get("sessions", [])
+        jgen, tail = read_journal()
+        if jgen != gen:
+            tail = []
+        archive = _archive()
+        archive.refresh()
+        refold = archive.gen > gen
+        if refold:
+            # the last fold archived these but didn't get to rewrite data.json
+            live = [x for x in live if month_key(x["start_ts"]) >= archive.cutoff]
+            tail = [x for x in tail if month_key(x["start_ts"]) >= archive.cutoff]
+        snap_n = len(live)
+        state["sessions"] = SessionLog(archive, live + tail)
+        _cache.update(sig=(dsig,) + sig[1:], state=state, gen=gen, snap_n=snap_n, journal_n=len(tail),
+                      daily=None, refold=refold)
+        return state
 
-def save(state):
+def _write_snapshot(doc):
+    # write-to-temp + rename: readers never see a half-written data.json
+    tmp = DATA_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        _cache["fmt"] = FORMAT or _cache["fmt"] or "json"
+        data = serializers.dumps(doc, _cache["fmt"])
+        if profiling.ENABLED: profiling.io("data.json", written=len(data))
+        f.write(data)
+        f.flush()
+        if FSYNC: os.fsync(f.fileno())
+    _replace(tmp, DATA_PATH)
+    return _stat_sig(DATA_PATH)
+
+def _replace(src, dst):
+    for attempt in range(50):
+        try:
+            return os.replace(src, dst)
+        except PermissionError:
+            # Windows refuses while another process has dst open for reading
+            if attempt == 49: raise
+            time.sleep(0.01)
+
+def _fold(state):
+    """Fold the journal into data.json and move sessions of earlier months to
+    the archive. A state that did not come from load() (plain list of
+    sessions) is taken as the complete history and replaces the archive."""
+    archive = _archive()
+    sessions = state.get("sessions", [])
+    if isinstance(sessions, SessionLog):
+        live = sessions.live
+    else:
+        archive.clear()
+        live = list(sessions)
+    gen = max(_cache["gen"], archive.gen) + 1
+    cutoff = month_key(time.time())
+    old = [x for x in live if month_key(x["start_ts"]) < cutoff]
+    if old:
+        archive.add(old, gen, cutoff)
+        live = [x for x in live if month_key(x["start_ts"]) >= cutoff]
+    dsig = _write_snapshot(dict(state, sessions=live, journal_gen=gen))
+    try:
+        os.remove(journal_path())
+    except FileNotFoundError:
+        pass
+    if isinstance(sessions, SessionLog):
+        sessions.live = live
+    else:
+        state["sessions"] = SessionLog(archive, live)
+    daily = _cache["daily"] if state is _cache["state"] else None
+    _cache.update(sig=(dsig, None, archive.sig), state=state, gen=gen, snap_n=len(live),
+                  journal_n=0, daily=daily, refold=False)
+
+def _stale_live(state):
+    live = state["sessions"].live
+    return bool(live) and month_key(live[0]["start_ts"]) < month_key(time.time())
+
+def _json_save(state):
+    """Persist state. Journaled sessions stay in the journal unless it has grown
+    past JOURNAL_COMPACT_AT; a state that did not come from load() is treated
+    as complete and replaces the journal too."""
+    with _LOCK:
+        own = state is _cache["state"] and _cache["sig"] == _disk_sig()
+        if (not own or _cache["journal_n"] >= JOURNAL_COMPACT_AT or _cache["refold"]
+                or _stale_live(state)):
+            _fold(state)
+            return
+        doc = dict(state, journal_gen=_cache["gen"])
+        doc["sessions"] = state["sessions"].live[:_cache["snap_n"]]
+        _cache["sig"] = (_write_snapshot(doc),) + _cache["sig"][1:]
+
+def _json_compact():
+    s = _json_load()
     with _LOCK:
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2)
+        _fold(s)
+
+def _json_append(recs, in_state=False):
+    s = _json_load()
+    with _LOCK:
+        fresh = s is _cache["state"] and _cache["sig"] == _disk_sig()
+        gen = _cache["gen"]
+        with open(journal_path(), "a+b") as f:
+            f.seek(0)
+            head = f.readline()
+            try:
+                ok = json.loads(head).get("journal") == gen
+            except ValueError:
+                ok = False
+            if not ok:
+                # missing, torn or stale header: start a fresh journal
+                f.truncate(0)
+                f.write(json.dumps({"journal": gen}).encode() + b"\n")
+                fresh = fresh and _cache["journal_n"] == 0
+            else:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")   # seal a torn line left by a crash
+            data = b"".join(json.dumps(rec).encode() + b"\n" for rec in recs)
+            if profiling.ENABLED: profiling.io("journal", written=len(data))
+            f.write(data)
+            f.flush()
+            if FSYNC: os.fsync(f.fileno())
+            jsig = _sig(os.fstat(f.fileno()))
+        if fresh:
+            _cache["journal_n"] += len(recs)
+            _cache["sig"] = (_cache["sig"][0], jsig, _cache["sig"][2])
+            if in_state:
+                # already in the live list, so a rollup built since then
+                # counts them; one built before doesn't: rebuild it
+                _cache["daily"] = None
+            else:
+                s["sessions"].extend(recs)
+                if _cache["daily"] is not None:
+                    for rec in recs: add_to_daily(_cache["daily"], rec)
+        else:
+            _cache["sig"] = None
+
+def _json_convert(fmt):
+    s = _json_load()
+    with _LOCK:
+        old, _cache["fmt"] = _cache["fmt"], fmt
+        _fold(s)
+    return old
+
+def _json_import(recs):
+    """Bulk-add sessions: those of closed months go straight into their archive
+    partitions (daily totals included), the rest through the journal."""
+    archive = _json_load()["sessions"].archive
+    with _LOCK:
+        cutoff = archive.cutoff or month_key(time.time())
+        old, new = [], []
+        for r in recs:
+            (old if month_key(r["start_ts"]) < cutoff else new).append(r)
+        if old:
+            archive.add(old, archive.gen, cutoff)
+    if new:
+        _json_append(new)
+
+def _json_iter(start_ts, end_ts):
+    log = _json_load()["sessions"]
+    def archived():
+        for m in log.archive.months_between(start_ts, end_ts):
+            # one month in memory at a time (imports may have appended out of order)
+            yield from sorted((x for x in log.archive.rows(m, cache=False) if start_ts <= x["start_ts"] <= end_ts),
+                              key=lambda x: x["start_ts"])
+    live = sorted((x for x in log.live if start_ts <= x["start_ts"] <= end_ts), key=lambda x: x["start_ts"])
+    yield from heapq.merge(archived(), live, key=lambda x: x["start_ts"])
+
+def _json_daily():
+    # archived months come with their rollups in the manifest; only the live
+    # list is aggregated here
+    s = _json_load()
+    with _LOCK:
+        cached = _cache["state"] is s
+        if cached and _cache["daily"] is not None:
+            return _cache["daily"]
+        daily = merge_daily(s["sessions"].archive.daily(), build_daily(s["sessions"].live))
+        if cached:
+            # kept until the next reload; _json_append() adds new sessions to
+            # it (or drops it when they were committed from a transaction)
+            _cache["daily"] = daily
+        return daily
+
+def _json_rebuild_daily():
+    s = _json_load()
+    log = s["sessions"]
+    log.archive.rebuild_daily()
+    with _LOCK:
+        if _cache["state"] is s:
+            _cache["daily"] = merge_daily(log.archive.daily(), build_daily(log.live))
+
+class JsonStore:
+    """data.json snapshot + append-only session journal + monthly archive."""
+    name = "json"
+    def load(self): return _json_load()
+    def save(self, state): _json_save(state)
+    def append_session(self, rec): _json_append([rec])
+    def commit(self, state, sessions):
+        if sessions:
+            _json_append(sessions, in_state=True)
+        _json_save(state)
+    def sessions_between(self, start_ts, end_ts):
+        return _json_load()["sessions"].between(start_ts, end_ts)
+    def iter_sessions(self, start_ts, end_ts): return _json_iter(start_ts, end_ts)
+    def import_sessions(self, recs): _json_import(recs)
+    def session_parts(self, start_ts, end_ts):
+        log = _json_load()["sessions"]
+        parts = [((log.archive.path, m, log.archive.manifest["months"][m]["bytes"]), log.archive.rows(m))
+                 for m in log.archive.months_between(start_ts, end_ts)]
+        return parts + [("live", log.live)]
+    def daily_between(self, first_day, last_day):
+        # in memory: archived months from the manifest, the live month
+        # aggregated on a cache miss and updated by every journal append
+        daily = _json_daily()
+        return [(k, daily[k]) for k in iter_days(first_day, last_day) if k in daily]
+    def rebuild_daily(self): _json_rebuild_daily()
+    def invalidate(self): _json_invalidate()
+    def compact(self): _json_compact()
+    def signature(self): return _disk_sig()
+
+# ---------- public API (dispatches to the selected backend)
+
+_store = None
+
+def use_backend(name):
+    """Switch storage backend ("json" or "sqlite") for this process."""
+    global _store, BACKEND
+    if name == "json":
+        store = JsonStore()
+    elif name == "sqlite":
+        import sqlite_store
+        store = sqlite_store.SqliteStore(sqlite_store.db_path_for(DATA_PATH))
+    else:
+        raise ValueError(f"unknown storage backend {name!r}")
+    old, _store, BACKEND = _store, store, name
+    if old is not None and hasattr(old, "close"):
+        old.close()
+    return store
+
+def _backend():
+    return _store or use_backend(BACKEND)
+
+# ---------- cross-process transactions
+# Every mutation goes through transaction(): it takes an OS-level lock on
+# data.lock (shared by tk_app.py and the pg_game.py process), loads the state
+# once, lets the caller mutate it and writes it back once. Nested
+# transactions, and load()/append_session()/reward() called inside one, join
+# the outer transaction, so a compound update is a single read and write.
+
+_TXN_LOCK = threading.RLock()
+_tx = threading.local()
+
+def lock_path():
+    return os.path.splitext(DATA_PATH)[0] + ".lock"
+
+class FileLock:
+    """Exclusive advisory lock on a file (flock on POSIX, msvcrt on Windows)."""
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+
+    def acquire(self):
+        self.f = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+            return
+        self.f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass   # LK_LOCK gives up after ~10 s; keep waiting
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+        else:
+            self.f.seek(0)
+            msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+        self.f.close()
+        self.f = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+@contextlib.contextmanager
+def _locked(defer=False):
+    """Hold the in-process and the cross-process lock (re-entrant per thread).
+    With defer the file lock stays held after the block, until the
+    write-behind writer has flushed (see set_durability())."""
+    with _TXN_LOCK:
+        if getattr(_tx, "locked", False):
+            yield
+            return
+        if defer:
+            if _wb["hold"] is None:
+                _wb["hold"] = FileLock(lock_path())
+                _wb["hold"].acquire()
+                _wb["held"] = time.monotonic()
+            _tx.locked = True
+            try:
+                yield
+            finally:
+                _tx.locked = False
+            return
+        _flush()   # deferred changes go first (and give the file lock back)
+        with FileLock(lock_path()):
+            _tx.locked = True
+            try:
+                yield
+            finally:
+                _tx.locked = False
+
+@contextlib.contextmanager
+def transaction():
+    """Atomic read-modify-write of the state:
+
+        with transaction() as s:
+            s["coins"] += 5
+
+    The state is written once when the outermost block exits; if the block
+    (or that write) raises nothing is written and the cached copy is dropped. In write-behind
+    mode the write is left to the background writer instead, and a block that
+    raises while earlier changes are still waiting for it is rolled back to
+    where it started."""
+    state = getattr(_tx, "state", None)
+    if state is not None:
+        yield state
+        return
+    defer = _wb["delay"] > 0 and not getattr(_tx, "locked", False)
+    with _locked(defer):
+        store = _backend()
+        _tx.state, _tx.sessions = store.load(), []
+        # earlier deferred changes live in the same object, so it can't just
+        # be dropped on an error: note what it takes to roll back to here
+        saved = _snapshot(_tx.state) if defer and _wb["pending"] else None
+        _tx.undo = [] if saved is not None else None
+        try:
+            yield _tx.state
+        except BaseException:
+            if saved is not None:
+                _restore(_tx.state, saved, len(_tx.sessions), _tx.undo)
+            else:
+                store.invalidate()
+                if defer:
+                    _flush()   # nothing pending: give the file lock back
+            raise
+        else:
+            if defer:
+                _defer(_tx.state, _tx.sessions)
+            else:
+                try:
+                    _commit(store, _tx.state, _tx.sessions)
+                except BaseException:
+                    store.invalidate()   # the cache holds what failed to write
+                    raise
+        finally:
+            _tx.state = _tx.sessions = _tx.undo = None
+    _changed()
+
+@profiling.timed("shared.commit")
+def _commit(store, state, sessions):
+    store.commit(state, sessions)
+
+# Rolling back must not cost a copy of the whole state on every deferred
+# edit, so _snapshot() goes one level deep only: the top-level values and the
+# items of each top-level dict/list (pointers, not copies). That undoes
+# anything a block adds, removes or replaces there. Edits made in place
+# further down (a subtask ticked off) are undone by the entries their editors
+# record with on_rollback(), as TaskIndex does. Sessions are only ever
+# appended to, so their count is enough.
+
+def _snapshot(state):
+    return [(k, v, v.copy() if isinstance(v, (dict, list)) else None)
+            for k, v in state.items() if k != "sessions"]
+
+def _restore(state, saved, appended, undo):
+    """Put state back as _snapshot() saw it: run the undo entries (latest
+    first), then drop the last `appended` sessions."""
+    for fn in reversed(undo):
+        fn()
+    sessions = state.get("sessions")
+    state.clear()
+    for k, v, items in saved:
+        if isinstance(v, dict):
+            v.clear(); v.update(items)
+        elif isinstance(v, list):
+            v[:] = items
+        state[k] = v
+    if sessions is not None:
+        live = sessions.live if hasattr(sessions, "live") else sessions
+        if appended:
+            del live[-appended:]
+            _cache["daily"] = None   # may have been built with them in
+        state["sessions"] = sessions
+
+def on_rollback(fn):
+    """Inside a transaction that may have to be rolled back without reloading
+    (write-behind, earlier changes pending), remember fn to undo an edit made
+    below the top level of the state; a no-op otherwise."""
+    undo = getattr(_tx, "undo", None)
+    if undo is not None:
+        undo.append(fn)
+
+# ---------- write-behind
+#
+# set_durability("balanced"|"fast") makes transaction() update the in-memory
+# state and return; a writer thread commits once the changes have been quiet
+# for the debounce delay (or, under a stream of edits, MAX_DEFER delays after
+# the first one), so a burst of edits costs one write. This process keeps
+# data.lock from the first deferred change until that write, so the other
+# process can't read a stale file and write over it; its transactions wait
+# for that write, which is why the writer never keeps the lock longer than
+# MAX_HOLD whatever the debounce. A failed write gives the lock back and is
+# retried; after MAX_FAILURES in a row the app drops to "safe", so the next
+# transaction retries it in the caller and the error reaches the UI.
+# Anything that takes the lock normally, flush(), invalidate() and process
+# exit write the pending changes first.
+
+DURABILITY = {              # name -> (debounce seconds, fsync)
+    "safe": (0.0, True),    # write-through: on disk before the handler returns
+    "balanced": (0.3, True),
+    "fast": (1.0, False),
+}
+MAX_DEFER = 4
+MAX_HOLD = 1.0              # seconds data.lock may stay held for deferred changes
+MAX_FAILURES = 3
+
+_wb = {"delay": 0.0, "mode": "safe", "hold": None, "pending": 0, "state": None, "sessions": [],
+       "first": 0.0, "last": 0.0, "held": 0.0, "thread": None, "error": None, "failures": 0}
+_wb_cond = threading.Condition(_TXN_LOCK)
+_wb_stats = {"writes": 0, "merged": 0, "errors": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0}
+
+def _defer(state, sessions):
+    now = time.monotonic()
+    if not _wb["pending"]:
+        _wb["first"] = now
+    _wb["pending"] += 1
+    _wb["state"], _wb["last"] = state, now
+    _wb["sessions"].extend(sessions)
+    if _wb["thread"] is None or not _wb["thread"].is_alive():
+        _wb["thread"] = threading.Thread(target=_writer, name="shared-writer", daemon=True)
+        _wb["thread"].start()
+    _wb_cond.notify()
+
+def _flush():
+    """Commit deferred changes (caller holds _TXN_LOCK). True if it wrote.
+    The file lock is given back whether or not the write succeeds."""
+    wrote = False
+    hold, _wb["hold"] = _wb["hold"], None
+    try:
+        if _wb["pending"]:
+            if hold is None:   # retrying a failed write
+                hold = FileLock(lock_path())
+                hold.acquire()
+            t0 = time.perf_counter()
+            _commit(_backend(), _wb["state"], _wb["sessions"])
+            ms = (time.perf_counter() - t0) * 1000
+            _wb_stats["writes"] += 1
+            _wb_stats["merged"] += _wb["pending"] - 1
+            _wb_stats["last_ms"] = ms; _wb_stats["total_ms"] += ms
+            _wb_stats["max_ms"] = max(_wb_stats["max_ms"], ms)
+            _wb.update(pending=0, state=None, sessions=[], error=None, failures=0)
+            wrote = True
+    finally:
+        if hold is not None:
+            hold.release()
+    return wrote
+
+def _writer():
+    while True:
+        with _TXN_LOCK:
+            while True:
+                if _wb["pending"] and _wb["delay"]:
+                    delay = _wb["delay"]
+                    due = min(_wb["last"] + delay, _wb["first"] + delay * MAX_DEFER)
+                    if _wb["hold"] is not None:
+                        due = min(due, _wb["held"] + MAX_HOLD)
+                    left = due - time.monotonic()
+                    if left <= 0:
+                        break
+                    _wb_cond.wait(left)
+                else:
+                    _wb_cond.wait()
+            try:
+                _flush()
+            except Exception as e:
+                # keep the changes and try again after a delay; the lock is
+                # free meanwhile
+                _wb_stats["errors"] += 1
+                _wb["failures"] += 1
+                _wb["error"] = f"{type(e).__name__}: {e}"
+                _wb["first"] = _wb["last"] = time.monotonic()
+                if _wb["failures"] >= MAX_FAILURES:
+                    _fall_back()
+                continue
+        _changed()   # now on disk: lets the hub tell Reward World
+
+def _fall_back():
+    # stop deferring: transactions now flush first and raise the write error
+    global FSYNC
+    _wb["delay"], FSYNC = DURABILITY["safe"]
+    _wb["mode"] = "safe"
+
+def flush():
+    """Write deferred changes now; returns True if there were any."""
+    with _TXN_LOCK:
+        wrote = _flush()
+    if wrote:
+        _changed()
+    return wrote
+
+def set_durability(mode):
+    """"safe" (write-through, the default), "balanced" or "fast": longer
+    debounce means fewer writes and a wider window of edits a crash can lose."""
+    global FSYNC
+    if mode not in DURABILITY:
+        raise ValueError(f"unknown durability {mode!r}")
+    delay, fsync = DURABILITY[mode]
+    with _TXN_LOCK:
+        if not delay:
+            _flush()
+        _wb.update(delay=delay, mode=mode, failures=0)
+        FSYNC = fsync
+    if delay:
+        atexit.unregister(flush); atexit.register(flush)
+
+def write_stats():
+    """Write-behind queue depth and writer latency (Diagnostics)."""
+    s = dict(_wb_stats)
+    s["mean_ms"] = s["total_ms"] / s["writes"] if s["writes"] else 0.0
+    s.update(durability=_wb["mode"], pending=_wb["pending"], error=_wb["error"],
+             failures=_wb["failures"])
+    return s
+
+@profiling.timed("shared.load")
+def load():
+    state = getattr(_tx, "state", None)
+    return state if state is not None else _backend().load()
+
+@profiling.timed("shared.save")
+def save(state):
+    """Write state as a whole. Prefer transaction() for read-modify-write."""
+    if state is getattr(_tx, "state", None):
+        return   # written when the enclosing transaction commits
+    if _wb["delay"] and state is _backend().load():
+        with transaction():
+            pass   # the live state: leave it to the writer
+        return
+    with _locked():
+        try:
+            _backend().save(state)
+        except BaseException:
+            _backend().invalidate()
+            raise
+    _changed()
 
 def append_session(start_ts, end_ts, kind):
     """Record a completed focus/break session."""
-    s = load()
-    s.setdefault("sessions", [])
-    s["sessions"].append({"start_ts": start_ts, "end_ts": end_ts, "type": kind})
-    save(s)
+    rec = {"start_ts": start_ts, "end_ts": end_ts, "type": kind}
+    state = getattr(_tx, "state", None)
+    if state is not None:
+        state.setdefault("sessions", []).append(rec)
+        _tx.sessions.append(rec)
+        return
+    with _locked():
+        _backend().append_session(rec)
+    _changed()
+
+def sessions_between(start_ts, end_ts):
+    """Sessions whose start_ts falls in [start_ts, end_ts], oldest first."""
+    return _backend().sessions_between(start_ts, end_ts)
+
+def iter_sessions(start_ts, end_ts):
+    """Generator over sessions with start_ts in [start_ts, end_ts], oldest
+    first, holding about one archived month (or one fetch) in memory."""
+    return _backend().iter_sessions(start_ts, end_ts)
+
+def import_sessions(recs):
+    """Add many already-validated session records at once (cli.py import)."""
+    with _locked():
+        _backend().import_sessions(recs)
+    _changed()
+
+def session_parts(start_ts, end_ts):
+    """Sessions covering [start_ts, end_ts] as [(key, rows)] chunks, for
+    analytics.py. key identifies an immutable chunk (an archived month) that
+    may be cached; "live" marks the list that still grows (may hold sessions
+    outside the range)."""
+    return _backend().session_parts(start_ts, end_ts)
+
+def daily_between(first_day, last_day):
+    """[(iso_day, totals)] for days in [first_day, last_day] that have sessions,
+    in O(days) — see add_to_daily() for the totals layout."""
+    return _backend().daily_between(first_day, last_day)
+
+def rebuild_daily():
+    """Recompute the per-day rollups from the raw sessions."""
+    with _locked():
+        _backend().rebuild_daily()
+
+def invalidate():
+    """Forget the cached state so the next load() re-reads from storage."""
+    flush()
+    _backend().invalidate()
+
+def signature():
+    """Cheap token that changes whenever another process commits (no parsing)."""
+    return _backend().signature()
+
+# ---------- change listeners (see notify.py)
+
+_listeners = []
+
+def add_listener(fn):
+    """Call fn() after every change this process commits."""
+    _listeners.append(fn)
+    return fn
+
+def remove_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+def _changed():
+    for fn in list(_listeners):
+        try:
+            fn()
+        except Exception:
+            pass
+
+def convert(fmt):
+    """Rewrite data.json in another serializers format; returns the old one."""
+    if not isinstance(_backend(), JsonStore):
+        raise RuntimeError("convert() applies to the json backend (data.json)")
+    if not serializers.available(fmt):
+        raise ValueError(f"format {fmt!r} is unknown or its package is not installed")
+    with _locked():
+        old = _json_convert(fmt)
+    _changed()
+    return old
+
+def compact():
+    """Fold the session journal back into the snapshot (json) / checkpoint the WAL (sqlite)."""
+    with _locked():
+        _backend().compact()
 
 def reward(coins=0, xp=0, sessions_inc=0):
-    s = load()
-    s["coins"] += coins
-    s["xp"] += xp
-    s["sessions_completed"] += sessions_inc
-    save(s)
+    with transaction() as s:
+        s["coins"] += coins
+        s["xp"] += xp
+        s["sessions_completed"] += sessions_inc
 
 def now_ts():
     return int(time.time())
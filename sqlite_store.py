@@ -0,0 +1,452 @@
+# sqlite_store.py
+"""SQLite storage backend for shared.py (select with FOCUSFORGE_BACKEND=sqlite).
+
+Sessions, tasks, subtasks and calendar notes live in their own tables so a
+report is an indexed range query and a task edit touches only the rows that
+changed. Everything else in the state (coins, options, inventory, ...) is a
+JSON value in `meta`.
+
+load() never reads the session history: state["sessions"] is a SessionRows
+view that queries the table when it is used. Tasks come back as TaskDict /
+TaskList containers that note their task id in the store's `dirty` set when
+they are changed in place, so a commit writes the tasks that changed without
+serializing the rest to find them.
+
+    python sqlite_store.py [data.json] [data.db]   # one-shot migration
+"""
+import json, os, sqlite3, sys, copy
+import shared, serializers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, pos INTEGER NOT NULL, title TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS subtasks (
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    id INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    done INTEGER NOT NULL,
+    PRIMARY KEY (task_id, id)
+);
+CREATE TABLE IF NOT EXISTS calendar (day TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_start_ts ON sessions(start_ts);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    focus INTEGER NOT NULL DEFAULT 0, short INTEGER NOT NULL DEFAULT 0, long INTEGER NOT NULL DEFAULT 0,
+    focus_n INTEGER NOT NULL DEFAULT 0, short_n INTEGER NOT NULL DEFAULT 0, long_n INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+DAILY_COLS = ("focus", "short", "long", "focus_n", "short_n", "long_n")
+DAILY_UPSERT = ("INSERT INTO daily (day, focus, short, long, focus_n, short_n, long_n) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(day) DO UPDATE SET " +
+                ", ".join(f"{c} = {c} + excluded.{c}" for c in DAILY_COLS))
+DAILY_REBUILD = """
+DELETE FROM daily;
+INSERT INTO daily (day, focus, short, long, focus_n, short_n, long_n)
+SELECT date(start_ts, 'unixepoch', 'localtime'),
+       SUM(CASE WHEN type = 'FOCUS' THEN MAX(0, end_ts - start_ts) ELSE 0 END),
+       SUM(CASE WHEN type = 'SHORT' THEN MAX(0, end_ts - start_ts) ELSE 0 END),
+       SUM(CASE WHEN type = 'LONG' THEN MAX(0, end_ts - start_ts) ELSE 0 END),
+       SUM(type = 'FOCUS'), SUM(type = 'SHORT'), SUM(type = 'LONG')
+FROM sessions GROUP BY 1;
+"""
+
+def _daily_row(rec):
+    dur, kind = max(0, rec["end_ts"] - rec["start_ts"]), rec["type"]
+    return (shared.day_key(rec["start_ts"]),
+            dur if kind == "FOCUS" else 0, dur if kind == "SHORT" else 0, dur if kind == "LONG" else 0,
+            int(kind == "FOCUS"), int(kind == "SHORT"), int(kind == "LONG"))
+
+TABLE_KEYS = ("tasks", "calendar", "sessions")
+
+def db_path_for(data_path):
+    return os.path.splitext(data_path)[0] + ".db"
+
+def _dump(v):
+    return json.dumps(v, sort_keys=True)
+
+def _session(row):
+    return {"start_ts": row[0], "end_ts": row[1], "type": row[2]}
+
+class SessionRows:
+    """state["sessions"] for the SQLite backend: the sessions table, queried
+    on demand, followed by `live`, the sessions appended in a transaction that
+    has not committed yet. Supports the list operations callers use: len,
+    iteration, indexing/slicing, append and between()."""
+    def __init__(self, store):
+        self.store = store
+        self.live = []
+
+    def _count(self):
+        with shared._LOCK:
+            return self.store.db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __len__(self):
+        return self._count() + len(self.live)
+
+    def __iter__(self):
+        yield from self.store.iter_sessions(None, None)
+        yield from list(self.live)
+
+    def __getitem__(self, i):
+        n = self._count()
+        if isinstance(i, slice):
+            start, stop, step = i.indices(n + len(self.live))
+            if step != 1:
+                return list(self)[i]
+            out = []
+            if start < min(stop, n):
+                with shared._LOCK:
+                    out = [_session(r) for r in self.store.db.execute(
+                        "SELECT start_ts, end_ts, type FROM sessions ORDER BY id LIMIT ? OFFSET ?",
+                        (min(stop, n) - start, start))]
+            out.extend(self.live[max(0, start-n):max(0, stop-n)])
+            return out
+        if i < 0: i += n + len(self.live)
+        if not 0 <= i < n + len(self.live): raise IndexError(i)
+        return self[i:i+1][0]
+
+    def append(self, rec):
+        self.live.append(rec)
+
+    def extend(self, recs):
+        self.live.extend(recs)
+
+    def between(self, start_ts, end_ts):
+        out = self.store.sessions_between(start_ts, end_ts)
+        out.extend(x for x in self.live if start_ts <= x["start_ts"] <= end_ts)
+        out.sort(key=lambda x: x["start_ts"])
+        return out
+
+# Tasks and subtasks as read from the database. Any in-place change adds the
+# task's id to the store's dirty set; copies and pickles are plain dicts/lists.
+
+class TaskDict(dict):
+    __slots__ = ("dirty", "tid")
+    def __deepcopy__(self, memo): return copy.deepcopy(dict(self), memo)
+    def __reduce_ex__(self, proto): return (dict, (dict(self),))
+
+class TaskList(list):
+    __slots__ = ("dirty", "tid")
+    def __deepcopy__(self, memo): return copy.deepcopy(list(self), memo)
+    def __reduce_ex__(self, proto): return (list, (list(self),))
+
+def _tracking(base, name):
+    f = getattr(base, name)
+    def method(self, *args, **kw):
+        self.dirty.add(self.tid)
+        return f(self, *args, **kw)
+    method.__name__ = name
+    return method
+
+for _name in ("__setitem__", "__delitem__", "__ior__", "update", "pop", "popitem", "setdefault", "clear"):
+    setattr(TaskDict, _name, _tracking(dict, _name))
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert",
+              "pop", "remove", "clear", "sort", "reverse"):
+    setattr(TaskList, _name, _tracking(list, _name))
+
+def _tracked(cls, dirty, tid, items):
+    obj = cls(items)
+    obj.dirty, obj.tid = dirty, tid
+    return obj
+
+class SqliteStore:
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        self.state = None
+        self.version = None
+        # what was last persisted: meta key / calendar day -> a copy of the
+        # value; task id -> (pos, JSON text or None for a task read back as
+        # TaskDict and not changed since)
+        self.written = {}
+        self.dirty = set()   # ids of tasks changed in place since the last commit
+        self.loose = set()   # ids of tasks holding containers that aren't tracked
+        if self.db.execute("SELECT 1 FROM meta LIMIT 1").fetchone() is None:
+            self._write_all(copy.deepcopy(shared.DEFAULTS))
+        elif (self.db.execute("SELECT 1 FROM daily LIMIT 1").fetchone() is None and
+              self.db.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is not None):
+            self.rebuild_daily()   # database from before the rollup table existed
+
+    def close(self):
+        self.db.close()
+
+    def _data_version(self):
+        # changes whenever another connection (the other process) commits
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    # ---- reads
+    def load(self):
+        with shared._LOCK:
+            v = self._data_version()
+            if self.state is not None and v == self.version:
+                shared._stats["hits"] += 1
+                return self.state
+            shared._stats["misses"] += 1
+            self.state, self.version = self._read_all(), v
+            return self.state
+
+    def _read_all(self):
+        db, written = self.db, {}
+        dirty = self.dirty = set()
+        self.loose = set()
+        state = {}
+        for k, v in db.execute("SELECT key, value FROM meta"):
+            state[k] = json.loads(v); written[("meta", k)] = json.loads(v)
+        tasks, by_id = [], {}
+        for i, (tid, title) in enumerate(db.execute("SELECT id, title FROM tasks ORDER BY pos")):
+            by_id[tid] = _tracked(TaskDict, dirty, tid, {"id": tid, "title": title,
+                                                          "subtasks": _tracked(TaskList, dirty, tid, ())})
+            tasks.append(by_id[tid])
+            written[("task", tid)] = (i, None)
+        for tid, sid, title, w, done in db.execute(
+                "SELECT task_id, id, title, weight, done FROM subtasks ORDER BY task_id, pos"):
+            sub = _tracked(TaskDict, dirty, tid, {"id": sid, "title": title, "weight": w, "done": bool(done)})
+            list.append(by_id[tid]["subtasks"], sub)
+        state["tasks"] = tasks
+        cal = {}
+        for day, v in db.execute("SELECT day, value FROM calendar"):
+            cal[day] = json.loads(v); written[("cal", day)] = json.loads(v)
+        state["calendar"] = cal
+        state["sessions"] = SessionRows(self)
+        self.written = written
+        return state
+
+    def sessions_between(self, start_ts, end_ts):
+        with shared._LOCK:
+            rows = self.db.execute("SELECT start_ts, end_ts, type FROM sessions "
+                                   "WHERE start_ts BETWEEN ? AND ? ORDER BY start_ts",
+                                   (start_ts, end_ts)).fetchall()
+        return [{"start_ts": a, "end_ts": b, "type": k} for a, b, k in rows]
+
+    def iter_sessions(self, start_ts, end_ts, chunk=5000):
+        """Sessions in [start_ts, end_ts] by start, or all of them in insertion
+        order when start_ts is None, fetched `chunk` rows at a time."""
+        cur = self.db.cursor()
+        with shared._LOCK:
+            if start_ts is None:
+                cur.execute("SELECT start_ts, end_ts, type FROM sessions ORDER BY id")
+            else:
+                cur.execute("SELECT start_ts, end_ts, type FROM sessions "
+                            "WHERE start_ts BETWEEN ? AND ? ORDER BY start_ts", (start_ts, end_ts))
+        try:
+            while True:
+                with shared._LOCK:
+                    rows = cur.fetchmany(chunk)
+                if not rows:
+                    return
+                for a, b, k in rows:
+                    yield {"start_ts": a, "end_ts": b, "type": k}
+        finally:
+            cur.close()
+
+    def session_parts(self, start_ts, end_ts):
+        return [("live", self.sessions_between(start_ts, end_ts))]
+
+    def daily_between(self, first_day, last_day):
+        with shared._LOCK:
+            rows = self.db.execute("SELECT day, " + ", ".join(DAILY_COLS) + " FROM daily "
+                                   "WHERE day BETWEEN ? AND ? ORDER BY day",
+                                   (first_day.isoformat(), last_day.isoformat())).fetchall()
+        return [(r[0], dict(zip(("FOCUS", "SHORT", "LONG", "FOCUS_n", "SHORT_n", "LONG_n"), r[1:])))
+                for r in rows]
+
+    def rebuild_daily(self):
+        with shared._LOCK:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                for stmt in DAILY_REBUILD.strip().split(";\n"):
+                    self.db.execute(stmt)
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    # ---- writes
+    def save(self, state):
+        self.commit(state, ())
+
+    def commit(self, state, sessions):
+        """Insert new sessions and write only the meta keys, tasks and calendar
+        days that changed, in one SQLite transaction.
+
+        Sessions already in the database are never rewritten."""
+        with shared._LOCK:
+            if state is not self.state or self.version != self._data_version():
+                self.written = {}   # unknown baseline: diff against nothing
+                self.loose = set()
+            db, written = self.db, self.written
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert_sessions(sessions)
+                if not written:
+                    db.execute("DELETE FROM meta"); db.execute("DELETE FROM tasks")
+                    db.execute("DELETE FROM calendar")
+                self._save_meta(state, written)
+                self._save_tasks(state.get("tasks", []), written)
+                self._save_calendar(state.get("calendar", {}), written)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                self.state = None
+                raise
+            self.dirty.clear()
+            log = state.get("sessions")
+            if isinstance(log, SessionRows) and log.live:
+                done = {id(x) for x in sessions}
+                log.live = [x for x in log.live if id(x) not in done]
+            if isinstance(log, SessionRows) and log.store is self:
+                self.state, self.version = state, self._data_version()
+            else:
+                self.state = None
+
+    def _save_meta(self, state, written):
+        # compared by value against a copy of what was written: no dumps for
+        # the keys that didn't change
+        keys = [k for k in state if k not in TABLE_KEYS]
+        for k in keys:
+            key = ("meta", k)
+            if key not in written or written[key] != state[k]:
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (k, _dump(state[k])))
+                written[key] = copy.deepcopy(state[k])
+        for key in [w for w in written if w[0] == "meta" and w[1] not in state]:
+            self.db.execute("DELETE FROM meta WHERE key = ?", (key[1],)); del written[key]
+
+    def _save_tasks(self, tasks, written):
+        # a TaskDict from the last read that isn't in `dirty` is unchanged
+        # (at most moved); anything else (new tasks, ones holding plain dicts
+        # added since) is compared by its JSON text
+        db, seen, dirty, loose = self.db, set(), self.dirty, self.loose
+        for pos, t in enumerate(tasks):
+            tid = t["id"]
+            key = ("task", tid); seen.add(key)
+            old = written.get(key)
+            if (old is not None and type(t) is TaskDict and t.dirty is dirty
+                    and tid not in dirty and tid not in loose):
+                if old[0] != pos:
+                    db.execute("UPDATE tasks SET pos = ? WHERE id = ?", (pos, tid))
+                    written[key] = (pos, old[1])
+                continue
+            row = (pos, _dump(t))
+            if old == row:
+                continue
+            db.execute("INSERT OR REPLACE INTO tasks (id, pos, title) VALUES (?, ?, ?)",
+                       (tid, pos, t["title"]))
+            db.execute("DELETE FROM subtasks WHERE task_id = ?", (tid,))
+            subs = t.get("subtasks", [])
+            db.executemany("INSERT INTO subtasks VALUES (?, ?, ?, ?, ?, ?)",
+                           [(tid, sub["id"], i, sub["title"], int(sub["weight"]), int(bool(sub["done"])))
+                            for i, sub in enumerate(subs)])
+            written[key] = row
+            if (type(t) is TaskDict and t.dirty is dirty and type(subs) is TaskList
+                    and all(type(sub) is TaskDict for sub in subs)):
+                loose.discard(tid)
+            else:
+                loose.add(tid)
+        for key in [w for w in written if w[0] == "task" and w not in seen]:
+            db.execute("DELETE FROM tasks WHERE id = ?", (key[1],)); del written[key]
+
+    def _save_calendar(self, cal, written):
+        for day, note in cal.items():
+            key = ("cal", day)
+            if key not in written or written[key] != note:
+                self.db.execute("INSERT OR REPLACE INTO calendar VALUES (?, ?)", (day, _dump(note)))
+                written[key] = copy.deepcopy(note)
+        for key in [w for w in written if w[0] == "cal" and w[1] not in cal]:
+            self.db.execute("DELETE FROM calendar WHERE day = ?", (key[1],)); del written[key]
+
+    def _write_all(self, state, sessions=()):
+        self.written = {}
+        self.state = state
+        self.version = None
+        self.save(state)
+        self.insert_sessions(sessions)
+
+    def append_session(self, rec):
+        with shared._LOCK:
+            fresh = self.state is not None and self.version == self._data_version()
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self._insert_sessions([rec])
+            if fresh:
+                self.version = self._data_version()   # the sessions view queries the table
+            else:
+                self.state = None
+
+    def import_sessions(self, sessions):
+        self.insert_sessions(sessions)
+
+    def insert_sessions(self, sessions):
+        with shared._LOCK:
+            with self.db:
+                self.db.execute("BEGIN")
+                self._insert_sessions(sessions)
+            self.state = None
+
+    def _insert_sessions(self, sessions):
+        """Insert sessions and fold them into the daily rollups (caller holds a transaction)."""
+        sessions = list(sessions)
+        self.db.executemany("INSERT INTO sessions (start_ts, end_ts, type) VALUES (?, ?, ?)",
+                            [(x["start_ts"], x["end_ts"], x["type"]) for x in sessions])
+        self.db.executemany(DAILY_UPSERT, [_daily_row(x) for x in sessions])
+
+    def signature(self):
+        with shared._LOCK:
+            return self._data_version()
+
+    def invalidate(self):
+        with shared._LOCK:
+            self.state = None
+
+    def compact(self):
+        with shared._LOCK:
+            self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+# ---------- one-shot migration from data.json
+
+def migrate(json_path=None, db_path=None, force=False):
+    """Copy data.json (with its session journal and archive) into a new SQLite database."""
+    json_path = json_path or shared.DATA_PATH
+    db_path = db_path or db_path_for(json_path)
+    if os.path.exists(db_path) and not force:
+        raise FileExistsError(f"{db_path} already exists (use force=True to overwrite)")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with open(json_path, "rb") as f:
+        state = serializers.loads(f.read())
+    gen = state.pop("journal_gen", 0)
+    archive = shared.Archive(os.path.splitext(json_path)[0] + ".archive")
+    sessions = [x for m in archive.months() for x in archive.rows(m)]
+    live = state.pop("sessions", [])
+    jgen, tail = shared.read_journal(os.path.splitext(json_path)[0] + ".sessions.jsonl")
+    if jgen != gen:
+        tail = []
+    if archive.gen > gen:   # interrupted fold: these months are archived already
+        live = [x for x in live if shared.month_key(x["start_ts"]) >= archive.cutoff]
+        tail = [x for x in tail if shared.month_key(x["start_ts"]) >= archive.cutoff]
+    sessions += live + tail
+    for k, v in shared.DEFAULTS.items():
+        state.setdefault(k, copy.deepcopy(v))
+    state.pop("sessions", None)
+    store = SqliteStore(db_path)
+    store._write_all(state, sessions)
+    store.close()
+    return db_path, len(sessions)
+
+if __name__ == "__main__":
+    path, n = migrate(*sys.argv[1:3])
+    print(f"Migrated {n} sessions to {path}. Run with FOCUSFORGE_BACKEND=sqlite to use it.")
@@ -0,0 +1,160 @@
+# task_store.py
+"""Indexed view over state["tasks"] for the Tasks tab.
+
+Tasks are still stored as the plain list of dicts in the state; TaskIndex
+adds dict indexes by task id and by (task id, subtask id) plus cached
+per-task progress, and applies edits to both the list and the indexes so
+nothing is found by scanning. Ids are keyed as strings (they come back from
+Treeview iids) and new ones come from a counter persisted in the state, so
+they never collide with existing or deleted ones.
+
+Edits register undo entries with shared.on_rollback(), so a transaction that
+raises can put the tasks and the indexes back without copying them.
+"""
+from shared import on_rollback
+
+class TaskIndex:
+    def __init__(self):
+        self.src = None        # the state["tasks"] list the indexes describe
+        self.tasks = {}        # "tid" -> task dict
+        self.subs = {}         # ("tid", "sid") -> subtask dict
+        self.done_pct = {}     # "tid" -> sum of weights of done subtasks
+        self.state = None
+
+    def bind(self, state):
+        """Index state["tasks"]; a no-op while it is the list indexed last time."""
+        tasks = state.setdefault("tasks", [])
+        self.state = state
+        if tasks is not self.src or len(tasks) != len(self.tasks):
+            self.src = tasks
+            self.tasks, self.subs, self.done_pct = {}, {}, {}
+            for t in tasks:
+                self._index_task(t)
+        return self
+
+    def _index_task(self, t):
+        tid = str(t["id"])
+        self.tasks[tid] = t
+        for sub in t.get("subtasks", []):
+            self.subs[(tid, str(sub["id"]))] = sub
+        self._recount(tid)
+
+    def _recount(self, tid):
+        t = self.tasks[tid]
+        self.done_pct[tid] = sum(sub["weight"] for sub in t.get("subtasks", []) if sub["done"])
+
+    def new_id(self):
+        """Next id from the persisted counter (never reused, never random)."""
+        s = self.state
+        if "next_id" not in s:
+            ids = [int(t["id"]) for t in self.src if str(t["id"]).isdigit()]
+            ids += [int(k[1]) for k in self.subs if k[1].isdigit()]
+            s["next_id"] = max(ids, default=0) + 1
+        nid = s["next_id"]
+        s["next_id"] = nid + 1
+        return nid
+
+    # ---- queries
+    def task(self, tid):
+        return self.tasks.get(str(tid))
+
+    def subtask(self, tid, sid):
+        return self.subs.get((str(tid), str(sid)))
+
+    def progress(self, tid):
+        return min(100, self.done_pct.get(str(tid), 0))
+
+    def total_weight(self, tid):
+        t = self.task(tid)
+        return sum(x["weight"] for x in t["subtasks"]) if t else 0
+
+    # ---- edits (caller holds a shared.transaction())
+    def add_task(self, title):
+        t = {"id": self.new_id(), "title": title, "subtasks": []}
+        tid = str(t["id"])
+        self.src.append(t)
+        self.tasks[tid] = t
+        self.done_pct[tid] = 0
+        on_rollback(lambda: (self.tasks.pop(tid, None), self.done_pct.pop(tid, None)))
+        return t
+
+    def add_subtask(self, tid, title, weight):
+        t = self.task(tid)
+        if t is None: return None
+        sub = {"id": self.new_id(), "title": title, "weight": int(weight), "done": False}
+        key = (str(tid), str(sub["id"]))
+        t["subtasks"].append(sub)
+        self.subs[key] = sub
+        on_rollback(lambda: (t["subtasks"].remove(sub), self.subs.pop(key, None)))
+        return sub
+
+    def set_weight(self, tid, sid, weight):
+        sub = self.subtask(tid, sid)
+        if sub is None: return None
+        self._undo_field(tid, sub, "weight")
+        sub["weight"] = int(weight)
+        self._recount(str(tid))
+        return sub
+
+    def toggle(self, tid, sid):
+        sub = self.subtask(tid, sid)
+        if sub is None: return None
+        self._undo_field(tid, sub, "done")
+        sub["done"] = not sub["done"]
+        self._recount(str(tid))
+        return sub
+
+    def delete_task(self, tid):
+        t = self.tasks.pop(str(tid), None)
+        if t is None: return
+        self.src.remove(t)
+        for sub in t["subtasks"]:
+            self.subs.pop((str(tid), str(sub["id"])), None)
+        self.done_pct.pop(str(tid), None)
+        on_rollback(lambda: self._index_task(t))
+
+    def delete_subtask(self, tid, sid):
+        sub = self.subs.pop((str(tid), str(sid)), None)
+        if sub is None: return
+        subs = self.tasks[str(tid)]["subtasks"]
+        pos = subs.index(sub)
+        del subs[pos]
+        self._recount(str(tid))
+        def undo():
+            subs.insert(pos, sub)
+            self.subs[(str(tid), str(sid))] = sub
+            self._recount(str(tid))
+        on_rollback(undo)
+
+    def _undo_field(self, tid, sub, field):
+        old = sub[field]
+        def undo():
+            sub[field] = old
+            self._recount(str(tid))
+        on_rollback(undo)
+
+    # ---- tree rows
+    def rows(self, count=None, expanded=None, extra=()):
+        """[(iid, parent_iid, text, values)] in display order.
+
+        count limits the top-level tasks (the first `count`), plus any later
+        ones whose id is in extra (e.g. a task just added at the end). expanded
+        is the set of task ids whose subtasks are wanted (None: all of them);
+        any other task with subtasks gets a single placeholder child "p:<tid>"
+        so the tree still shows it can be opened."""
+        out = []
+        tasks = self.src if count is None else self.src[:count]
+        if count is not None and extra:
+            tasks = tasks + [t for t in self.src[count:] if str(t["id"]) in extra]
+        for t in tasks:
+            tid = f"t:{t['id']}"
+            out.append((tid, "", t["title"], ("", "")))
+            subs = t.get("subtasks", [])
+            if expanded is not None and str(t["id"]) not in expanded:
+                if subs:
+                    out.append((f"p:{t['id']}", tid, "…", ("", "")))
+                continue
+            for sub in subs:
+                out.append((f"s:{t['id']}:{sub['id']}", tid, sub["title"],
+                            (sub["weight"], "✓" if sub["done"] else "")))
+        return out
@@ -0,0 +1,19 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shared
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    """A fresh data file in tmp_path on each backend, in "safe" mode."""
+    monkeypatch.setattr(shared, "DATA_PATH", str(tmp_path / "data.json"))
+    shared.use_backend(request.param)
+    shared.set_durability("safe")
+    yield request.param
+    shared.set_durability("safe")
+    shared.invalidate()
+    store = shared._store
+    if hasattr(store, "close"):
+        store.close()
+    shared._store = None
@@ -0,0 +1,23 @@
+import datetime as dt
+import analytics, shared
+
+def test_reversed_range_gives_an_empty_summary(store):
+    now = shared.now_ts()
+    shared.append_session(now - 600, now, "FOCUS")
+    today = dt.date.today()
+    rep = analytics.summary(today, today - dt.timedelta(days=3))
+    assert rep["streak"] == (0, None, None)
+    assert rep["peak_hour"] == (0, 0)
+    assert rep["rolling_avg"] == 0.0
+    cols = analytics.SessionColumns([{"start_ts": now - 600, "end_ts": now, "type": "FOCUS"}])
+    assert cols.by_day(today, today - dt.timedelta(days=1)) == []
+    assert cols.by_hour(today, today - dt.timedelta(days=1)) == [0] * 24
+    assert shared.daily_between(today, today - dt.timedelta(days=1)) == []
+
+def test_summary_counts_todays_focus(store):
+    now = shared.now_ts()
+    shared.append_session(now - 600, now, "FOCUS")
+    today = dt.date.fromtimestamp(now - 600)
+    rep = analytics.summary(today, today)
+    assert rep["streak"][0] == 1
+    assert rep["peak_hour"][1] == 600
@@ -0,0 +1,112 @@
+import pytest
+import shared
+
+def fail_writes(monkeypatch, backend):
+    def boom(*a, **k):
+        raise OSError(28, "No space left on device")
+    if backend == "json":
+        monkeypatch.setattr(shared, "_write_snapshot", boom)
+    else:
+        monkeypatch.setattr(shared._store, "_save_meta", boom)
+
+def test_failed_write_drops_the_cached_change(store, monkeypatch):
+    shared.load()
+    with monkeypatch.context() as m:
+        fail_writes(m, store)
+        with pytest.raises(OSError):
+            shared.reward(100, 0, 0)
+        assert shared.load()["coins"] == 0
+    # the next unrelated save must not carry the failed change with it
+    with shared.transaction() as s:
+        s["xp"] += 1
+    shared.invalidate()
+    s = shared.load()
+    assert (s["coins"], s["xp"]) == (0, 1)
+
+def test_failed_save_drops_the_cached_change(store, monkeypatch):
+    s = shared.load()
+    s["coins"] = 7
+    with monkeypatch.context() as m:
+        fail_writes(m, store)
+        with pytest.raises(OSError):
+            shared.save(s)
+    assert shared.load()["coins"] == 0
+
+# ---------- write-behind rollback
+
+def big_tasks(n, subs=5):
+    return [{"id": i, "title": f"Task {i}", "subtasks": [
+                {"id": n + (i - 1) * subs + j + 1, "title": f"Step {j}", "weight": 20, "done": False}
+                for j in range(subs)]} for i in range(1, n + 1)]
+
+def test_failed_block_rolls_back_with_writes_pending(store):
+    import copy
+    from task_store import TaskIndex
+    with shared.transaction() as s:
+        s["tasks"] = big_tasks(3)
+    shared.set_durability("balanced")
+    with shared.transaction() as s:
+        TaskIndex().bind(s).toggle(1, 4)    # pending: stays
+        s["coins"] = 5
+    before = copy.deepcopy({k: v for k, v in shared.load().items() if k != "sessions"})
+    n = len(shared.load()["sessions"])
+    idx = TaskIndex()
+    with pytest.raises(RuntimeError):
+        with shared.transaction() as s:
+            idx.bind(s)
+            idx.toggle(2, 9)
+            idx.set_weight(2, 10, 70)
+            idx.add_subtask(3, "extra", 5)
+            idx.delete_subtask(3, 14)
+            idx.delete_task(1)
+            idx.add_task("new")
+            s["coins"] += 100
+            s["options"]["focus_minutes"] = 1
+            s["events"] = [{"id": 1}]
+            shared.append_session(1, 2, "FOCUS")
+            raise RuntimeError
+    s = shared.load()
+    assert {k: v for k, v in s.items() if k != "sessions"} == before
+    assert len(s["sessions"]) == n
+    fresh = TaskIndex().bind({"tasks": copy.deepcopy(s["tasks"])})
+    idx.bind(s)
+    assert (idx.tasks.keys(), idx.subs.keys(), idx.done_pct) == (fresh.tasks.keys(), fresh.subs.keys(), fresh.done_pct)
+    shared.flush()
+    shared.invalidate()
+    s = shared.load()
+    assert (s["coins"], s["tasks"][0]["subtasks"][0]["done"]) == (5, True)
+
+def test_deferred_edit_on_a_large_task_list_is_cheap(store):
+    import time
+    from task_store import TaskIndex
+    with shared.transaction() as s:
+        s["tasks"] = big_tasks(20000)
+    idx = TaskIndex()
+    def edit(sid):
+        t0 = time.perf_counter()
+        with shared.transaction() as s:
+            idx.bind(s).toggle(1 + (sid - 20001) // 5, sid)
+        return time.perf_counter() - t0
+    safe = min(edit(20001 + i) for i in range(3))
+    shared.set_durability("balanced")
+    edit(20010)   # now there is a write pending: every edit below can be rolled back
+    deferred = min(edit(20011 + i) for i in range(5))
+    assert shared.write_stats()["pending"]
+    assert deferred < min(0.05, safe / 4), (deferred, safe)
+
+def test_daily_counts_a_deferred_session_once(store):
+    import datetime as dt
+    today = dt.date.today()
+    now = shared.now_ts()
+    shared.set_durability("balanced")
+    with shared.transaction():
+        shared.append_session(now - 100, now, "FOCUS")
+    shared.daily_between(today, today)   # rollup built while the write is pending
+    shared.flush()
+    [(_, d)] = shared.daily_between(today, today)
+    assert (d["FOCUS"], d["FOCUS_n"]) == (100, 1)
+    with shared.transaction():
+        shared.append_session(now - 50, now, "FOCUS")
+    shared.flush()
+    [(_, d)] = shared.daily_between(today, today)
+    assert (d["FOCUS"], d["FOCUS_n"]) == (150, 2)
@@ -0,0 +1,74 @@
+import sqlite3
+import pytest
+import shared, sqlite_store
+from task_store import TaskIndex
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared, "DATA_PATH", str(tmp_path / "data.json"))
+    store = shared.use_backend("sqlite")
+    shared.set_durability("safe")
+    yield store
+    store.close()
+    shared._store = None
+
+def statements(store):
+    seen = []
+    store.db.set_trace_callback(seen.append)
+    return seen
+
+def test_load_leaves_sessions_in_the_table(db):
+    shared.import_sessions([{"start_ts": 1000 + i, "end_ts": 1100 + i, "type": "FOCUS"} for i in range(50)])
+    # another process writes: the next load() is a miss
+    other = sqlite3.connect(db.path)
+    other.execute("UPDATE meta SET value = '5' WHERE key = 'coins'"); other.commit(); other.close()
+    seen = statements(db)
+    s = shared.load()
+    assert s["coins"] == 5
+    assert not [q for q in seen if "FROM sessions" in q]
+    log = s["sessions"]
+    assert len(log) == 50 and log[0]["start_ts"] == 1000 and log[-1]["start_ts"] == 1049
+    assert [x["start_ts"] for x in log[10:13]] == [1010, 1011, 1012]
+    assert [x["start_ts"] for x in log.between(1020, 1022)] == [1020, 1021, 1022]
+    with shared.transaction():
+        shared.append_session(2000, 2100, "FOCUS")
+    assert len(shared.load()["sessions"]) == 51 and shared.load()["sessions"][-1]["start_ts"] == 2000
+
+def test_commit_writes_only_the_changed_task(db, monkeypatch):
+    with shared.transaction() as s:
+        idx = TaskIndex().bind(s)
+        for i in range(200):
+            t = idx.add_task(f"Task {i}")
+            idx.add_subtask(t["id"], "step", 50)
+    shared.invalidate()
+    idx = TaskIndex()
+    dumps = []
+    real = sqlite_store._dump
+    monkeypatch.setattr(sqlite_store, "_dump", lambda v: dumps.append(v) or real(v))
+    seen = statements(db)
+    with shared.transaction() as s:
+        t = s["tasks"][100]
+        idx.bind(s).toggle(t["id"], t["subtasks"][0]["id"])
+    writes = [q for q in seen if q.startswith(("INSERT", "UPDATE", "DELETE"))]
+    assert len(dumps) == 1 and dumps[0]["id"] == t["id"]
+    assert all(str(t["id"]) in q for q in writes if "tasks" in q), writes
+    # moving tasks rewrites positions only
+    seen.clear(); dumps.clear()
+    with shared.transaction() as s:
+        idx.bind(s).delete_task(s["tasks"][0]["id"])
+    assert dumps == []
+    shared.invalidate()
+    s = shared.load()
+    assert len(s["tasks"]) == 199 and s["tasks"][99]["subtasks"][0]["done"] is True
+
+def test_plain_dicts_added_to_a_read_task_are_still_saved(db):
+    with shared.transaction() as s:
+        TaskIndex().bind(s).add_task("A")
+    shared.invalidate()
+    idx = TaskIndex()
+    with shared.transaction() as s:
+        sub = idx.bind(s).add_subtask(s["tasks"][0]["id"], "step", 10)
+    with shared.transaction() as s:
+        sub["done"] = True    # a plain dict: not tracked, found by comparison
+    shared.invalidate()
+    assert shared.load()["tasks"][0]["subtasks"][0]["done"] is True
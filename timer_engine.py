@@ -0,0 +1,145 @@
+# timer_engine.py
+"""Deadline-based countdown for the Pomodoro tab.
+
+The timer keeps an absolute deadline on time.monotonic() and derives the
+remaining time from it, so late callbacks, slow saves or a busy event loop
+never accumulate drift. It is driven by a scheduler with Tk's after() /
+after_cancel() signature and wakes up just after the displayed second
+changes instead of every N ms.
+
+    python timer_engine.py   # fake-clock harness: 25 min with jittery callbacks
+"""
+import math, time
+
+class CountdownTimer:
+    WAKE_SLACK = 0.005   # wake this long after a second boundary, not before it
+
+    def __init__(self, schedule, cancel, on_tick, on_done, clock=time.monotonic):
+        self.schedule, self.cancel_cb = schedule, cancel
+        self.on_tick, self.on_done = on_tick, on_done
+        self.clock = clock
+        self.deadline = None    # set while running
+        self.paused_left = None # set while paused
+        self.shown = None
+        self._job = None
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    @property
+    def paused(self):
+        return self.paused_left is not None
+
+    def remaining(self):
+        if self.deadline is not None:
+            return max(0.0, self.deadline - self.clock())
+        return self.paused_left or 0.0
+
+    def start(self, seconds):
+        self.cancel()
+        self.deadline = self.clock() + seconds
+        self._tick()
+
+    def pause(self):
+        if self.deadline is None: return
+        self.paused_left = self.remaining()
+        self._unschedule()
+        self.deadline = None
+
+    def resume(self):
+        if self.paused_left is None: return
+        self.deadline = self.clock() + self.paused_left
+        self.paused_left = None
+        self._tick()
+
+    def cancel(self):
+        self._unschedule()
+        self.deadline = self.paused_left = self.shown = None
+
+    def _unschedule(self):
+        if self._job is not None:
+            self.cancel_cb(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        left = self.deadline - self.clock()
+        if left <= 0:
+            self.deadline = None
+            if self.shown != 0:
+                self.shown = 0
+                self.on_tick(0)
+            self.on_done()
+            return
+        secs = math.ceil(left)
+        if secs != self.shown:
+            self.shown = secs
+            self.on_tick(secs)
+        # sleep until the display would change (or the deadline)
+        wait = left - (secs - 1) + self.WAKE_SLACK
+        self._job = self.schedule(max(1, int(wait * 1000)), self._tick)
+
+# ---------- fake-clock harness
+
+class FakeLoop:
+    """Deterministic stand-in for Tk's event loop: callbacks fire late by a
+    random jitter, with the occasional long stall (a slow save, a dialog)."""
+    def __init__(self, rng, jitter=0.03, stall_every=40, stall=0.4):
+        self.now = 0.0
+        self.rng, self.jitter, self.stall_every, self.stall = rng, jitter, stall_every, stall
+        self.jobs = {}
+        self.seq = 0
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, fn):
+        self.seq += 1
+        late = self.rng.uniform(0, self.jitter)
+        if self.seq % self.stall_every == 0:
+            late += self.stall
+        self.jobs[self.seq] = (self.now + ms / 1000 + late, fn)
+        return self.seq
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run(self, until):
+        while self.jobs and self.now < until:
+            job = min(self.jobs, key=lambda j: self.jobs[j][0])
+            at, fn = self.jobs.pop(job)
+            self.now = max(self.now, at)
+            fn()
+
+def _harness(seconds=25*60, seed=1):
+    import random
+    loop = FakeLoop(random.Random(seed))
+    ticks, done = [], []
+    t = CountdownTimer(loop.after, loop.after_cancel,
+                       on_tick=lambda s: ticks.append((loop.now, s)),
+                       on_done=lambda: done.append(loop.now),
+                       clock=loop.clock)
+    t.start(seconds)
+    # pause for 90 s in the middle of the session
+    loop.run(until=600.0)
+    t.pause(); left = t.remaining(); loop.now += 90.0; t.resume()
+    assert abs(t.remaining() - left) < 1e-9, "pause/resume must keep the remaining time exactly"
+    loop.run(until=10 * seconds)
+    expected_end = seconds + 90.0
+    end_err = done[0] - expected_end
+    # each label change should land right after the second it announces began
+    lag = sorted(now - (expected_end - s if now > 600 else seconds - s) for now, s in ticks if s > 0)
+    # the old loop (sleep(1); remaining -= 1) under the same jitter: every
+    # late wake-up adds to the total instead of being absorbed
+    rng, naive = random.Random(seed), 0.0
+    for i in range(1, seconds + 1):
+        naive += 1 + rng.uniform(0, loop.jitter) + (loop.stall if i % loop.stall_every == 0 else 0)
+    return end_err, lag[len(lag) // 2], lag[-1], naive - seconds
+
+if __name__ == "__main__":
+    for seed in range(5):
+        end_err, median, worst, naive = _harness(seed=seed)
+        print(f"seed {seed}: finished {end_err*1000:+.1f} ms off (sleep loop: {naive:+.1f} s), "
+              f"label lag median {median*1000:.1f} ms, worst {worst*1000:.1f} ms (injected stalls)")
+        assert 0 <= end_err < 0.1
@@ -1,39 +1,46 @@
 # tk_app.py
+import time
+_T0 = time.perf_counter()   # for --startup-time
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, colorchooser
-import time, threading, calendar, datetime as dt, random
-try:
-    import winsound
-    HAS_WINSOUND = True
-except Exception:
-    HAS_WINSOUND = False
+import calendar, datetime as dt
 
-from shared import load, save, reward, append_session, now_ts
-import subprocess, sys, os
+from shared import load, transaction, reward, append_session, daily_between, now_ts
+from shared import (REWARD_FOCUS_COINS, REWARD_FOCUS_XP,
+                    REWARD_SUBTASK_COINS_PER_PCT, REWARD_SUBTASK_XP_PER_PCT)
+import subprocess, sys, os, threading
+import audio, notify, analytics, profiling, shared
+from timer_engine import CountdownTimer
+from task_store import TaskIndex
+from calendar_events import EventCalendar, REPEATS, new_event, delete_event
 
 APP_TITLE = "FocusForge — Productivity + Game"
-REWARD_FOCUS_COINS = 10
-REWARD_FOCUS_XP    = 15
-REWARD_SUBTASK_COINS_PER_PCT = 0.1   # e.g., weight 20% -> 2 coins
-REWARD_SUBTASK_XP_PER_PCT    = 0.15  # e.g., weight 20% -> 3 xp
 
 # ---------- utilities
 
 def play_beep(kind="ok", root=None):
-    """Small cross-platform alert. Respects settings.sound_enabled."""
-    s = load()
-    if not s["options"].get("sound_enabled", True):
+    """Small cross-platform alert. Respects settings.sound_enabled (through
+    audio.enabled, kept in sync with the options) and never blocks."""
+    audio.alert(kind, bell=lambda: (root or tk._default_root).bell())
+
+# Tk callbacks scheduled by defer() that haven't run yet, and totals. With
+# refreshes pushed on events this stays at 0-1 per widget however long the
+# app runs; a number that keeps growing means a callback chain is leaking.
+REFRESH_STATS = {"active": 0, "scheduled": 0, "merged": 0, "ran": 0}
+
+def defer(widget, fn):
+    """Run fn once when Tk is idle; requests made before it runs are merged."""
+    pending = widget.__dict__.setdefault("_deferred", set())
+    if fn in pending:
+        REFRESH_STATS["merged"] += 1
         return
-    if HAS_WINSOUND:
-        if kind == "start":  winsound.Beep(880, 120)
-        elif kind == "end":  winsound.Beep(1046, 180)
-        else:                winsound.Beep(740, 120)
-    else:
-        # fallback: tk bell
-        try:
-            (root or tk._default_root).bell()
-        except Exception:
-            pass
+    pending.add(fn)
+    REFRESH_STATS["active"] += 1; REFRESH_STATS["scheduled"] += 1
+    def run():
+        pending.discard(fn)
+        REFRESH_STATS["active"] -= 1; REFRESH_STATS["ran"] += 1
+        fn()
+    widget.after_idle(run)
 
 def nice_time(seconds):
     m, s = divmod(max(0, int(seconds)), 60)
@@ -42,16 +49,17 @@ def nice_time(seconds):
 # ---------- Pomodoro tab
 
 class PomodoroTab(ttk.Frame):
-    def __init__(self, master, stats_refresh_cb):
+    def __init__(self, master, stats_refresh_cb, state=None):
         super().__init__(master)
         self.stats_refresh_cb = stats_refresh_cb
         self.running = False
         self.current_kind = "FOCUS"  # or SHORT or LONG
         self.completed_focus_in_cycle = 0
         self.start_ts = None
-        self.remaining = 0
-        self.stop_flag = False
-        self.timer_thread = None
+        # deadline-based countdown on the Tk loop (no thread, no drift)
+        self.timer = CountdownTimer(self.after, self.after_cancel,
+                                    on_tick=lambda secs: self.time_lbl.config(text=nice_time(secs)),
+                                    on_done=self._finished)
 
         # controls
         self.title = ttk.Label(self, text="Pomodoro", font=("Segoe UI", 16, "bold"))
@@ -64,17 +72,22 @@ class PomodoroTab(ttk.Frame):
         # buttons
         row = ttk.Frame(self); row.pack()
         ttk.Button(row, text="Start Focus", command=self.start_focus).pack(side="left", padx=5)
+        self.pause_btn = ttk.Button(row, text="Pause", command=self.toggle_pause)
+        self.pause_btn.pack(side="left", padx=5)
         ttk.Button(row, text="Stop", command=self.stop).pack(side="left", padx=5)
         ttk.Button(row, text="Reset", command=self.reset).pack(side="left", padx=5)
 
         # options
-        self.opts = load()["options"]
+        self.opts = (state or load())["options"]
+        audio.enabled = self.opts.get("sound_enabled", True)
         optf = ttk.LabelFrame(self, text="Options"); optf.pack(padx=8, pady=8, fill="x")
         self.var_focus = tk.IntVar(value=self.opts.get("focus_minutes",25))
         self.var_short = tk.IntVar(value=self.opts.get("short_break_minutes",5))
         self.var_long  = tk.IntVar(value=self.opts.get("long_break_minutes",15))
         self.var_after = tk.IntVar(value=self.opts.get("long_after_n_focus",2))
         self.var_sound = tk.BooleanVar(value=self.opts.get("sound_enabled", True))
+        self.var_prewarm = tk.BooleanVar(value=self.opts.get("prewarm_world", False))
+        self.var_durability = tk.StringVar(value=self.opts.get("durability", "balanced"))
 
         for text,var in [("Focus (min)",self.var_focus),("Short break (min)",self.var_short),
                          ("Long break (min)",self.var_long),("Long break after N focus",self.var_after)]:
@@ -84,6 +97,14 @@ class PomodoroTab(ttk.Frame):
 
         r = ttk.Frame(optf); r.pack(fill="x", pady=2)
         ttk.Checkbutton(r, text="Sound alerts", variable=self.var_sound).pack(side="left")
+        ttk.Checkbutton(r, text="Keep Reward World ready in the background",
+                        variable=self.var_prewarm).pack(side="left", padx=12)
+        r = ttk.Frame(optf); r.pack(fill="x", pady=2)
+        ttk.Label(r, text="Saving", width=22).pack(side="left")
+        ttk.Combobox(r, textvariable=self.var_durability, values=tuple(shared.DURABILITY),
+                     width=9, state="readonly").pack(side="left")
+        ttk.Label(r, text="safe: write every change at once · balanced / fast: batch writes",
+                  foreground="#666").pack(side="left", padx=6)
         ttk.Button(optf, text="Save Options", command=self.save_options).pack(pady=6)
 
         self.status = ttk.Label(self, text="Ready.")
@@ -91,14 +112,17 @@ class PomodoroTab(ttk.Frame):
 
     # ---- state & logic
     def save_options(self):
-        s = load()
-        s["options"]["focus_minutes"] = max(1, self.var_focus.get())
-        s["options"]["short_break_minutes"] = max(1, self.var_short.get())
-        s["options"]["long_break_minutes"] = max(1, self.var_long.get())
-        s["options"]["long_after_n_focus"] = max(1, self.var_after.get())
-        s["options"]["sound_enabled"] = bool(self.var_sound.get())
-        save(s)
+        with transaction() as s:
+            s["options"]["focus_minutes"] = max(1, self.var_focus.get())
+            s["options"]["short_break_minutes"] = max(1, self.var_short.get())
+            s["options"]["long_break_minutes"] = max(1, self.var_long.get())
+            s["options"]["long_after_n_focus"] = max(1, self.var_after.get())
+            s["options"]["sound_enabled"] = bool(self.var_sound.get())
+            s["options"]["prewarm_world"] = bool(self.var_prewarm.get())
+            s["options"]["durability"] = self.var_durability.get()
         self.opts = s["options"]
+        shared.set_durability(self.opts["durability"])
+        audio.enabled = self.opts["sound_enabled"]
         messagebox.showinfo("Saved", "Timer options updated.")
 
     def start_focus(self):
@@ -122,38 +146,40 @@ class PomodoroTab(ttk.Frame):
 
     def _start(self, seconds):
         self.running = True
-        self.stop_flag = False
         self.start_ts = now_ts()
-        self.remaining = seconds
-        self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
-        self.timer_thread.start()
+        self.pause_btn.config(text="Pause")
+        self.timer.start(seconds)
+
+    def toggle_pause(self):
+        if self.timer.paused:
+            self.timer.resume()
+            self.pause_btn.config(text="Pause")
+            self.status.config(text="Resumed.")
+        elif self.timer.running:
+            self.timer.pause()
+            self.pause_btn.config(text="Resume")
+            self.status.config(text="Paused.")
 
     def stop(self):
-        self.stop_flag = True
+        self.timer.cancel()
         self.running = False
+        self.pause_btn.config(text="Pause")
         self.status.config(text="Stopped.")
 
     def reset(self):
         self.stop()
-        self.remaining = 0
         self.time_lbl.config(text="00:00")
 
-    def _run_timer(self):
-        while self.remaining > 0 and not self.stop_flag:
-            self.time_lbl.config(text=nice_time(self.remaining))
-            time.sleep(1)
-            self.remaining -= 1
-
-        if self.stop_flag:
-            return
-        # finished
+    def _finished(self):
         self.running = False
         end_ts = now_ts()
-        append_session(self.start_ts, end_ts, self.current_kind)
+        with transaction():   # session + reward: one locked read and write
+            append_session(self.start_ts, end_ts, self.current_kind)
+            if self.current_kind == "FOCUS":
+                reward(REWARD_FOCUS_COINS, REWARD_FOCUS_XP, 1)
+        shared.flush()   # a finished session goes to disk now, not after the debounce
 
         if self.current_kind == "FOCUS":
-            # reward
-            reward(REWARD_FOCUS_COINS, REWARD_FOCUS_XP, 1)
             self.completed_focus_in_cycle += 1
             play_beep("end", self)
             self.stats_refresh_cb()
@@ -171,6 +197,8 @@ class PomodoroTab(ttk.Frame):
 # ---------- Tasks tab
 
 class TasksTab(ttk.Frame):
+    PAGE = 200   # top-level tasks added to the tree per page while scrolling
+
     def __init__(self, master, stats_refresh_cb):
         super().__init__(master)
         self.stats_refresh_cb = stats_refresh_cb
@@ -178,13 +206,17 @@ class TasksTab(ttk.Frame):
         ttk.Label(top, text="Tasks & Subtasks (weighted)", font=("Segoe UI", 12, "bold")).pack(side="left", padx=6)
         ttk.Button(top, text="New Task", command=self.add_task).pack(side="right", padx=6)
 
-        self.tree = ttk.Treeview(self, columns=("weight","done"), show="tree headings", selectmode="browse")
+        treef = ttk.Frame(self); treef.pack(fill="both", expand=True, padx=6, pady=(0,6))
+        self.tree = ttk.Treeview(treef, columns=("weight","done"), show="tree headings", selectmode="browse")
         self.tree.heading("#0", text="Title")
         self.tree.heading("weight", text="Weight %")
         self.tree.heading("done", text="Done?")
         self.tree.column("weight", width=80, anchor="center")
         self.tree.column("done", width=60, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=6, pady=(0,6))
+        self.sb = ttk.Scrollbar(treef, orient="vertical", command=self.tree.yview)
+        self.sb.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.configure(yscrollcommand=self._scrolled)
 
         btns = ttk.Frame(self); btns.pack(fill="x", pady=4)
         ttk.Button(btns, text="Add Subtask", command=self.add_subtask).pack(side="left", padx=4)
@@ -195,36 +227,91 @@ class TasksTab(ttk.Frame):
         self.progress = ttk.Progressbar(self, orient="horizontal", mode="determinate", length=400)
         self.progress.pack(pady=6)
 
+        self.index = TaskIndex()
+        self.shown = {}   # iid -> (parent, text, values) as last put in the tree
+        self.order = {}   # parent iid -> child iids as last put in the tree
+        # only the first `loaded` tasks are in the tree, and only the
+        # subtasks of open ones; closed tasks carry a placeholder child.
+        # Tasks revealed past the loaded pages are shown on their own
+        self.loaded = self.PAGE
+        self.extra = set()
+        self.expanded = set()
         self.refresh_tree()
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.update_progress())
+        self.tree.bind("<<TreeviewOpen>>", lambda e: self._opened(True))
+        self.tree.bind("<<TreeviewClose>>", lambda e: self._opened(False))
 
     def _data(self):
         return load()
 
-    def _save(self, state):
-        save(state)
+    def _index(self, s=None):
+        """The TaskIndex over s (or the current state), rebuilt only when the
+        tasks list was reloaded."""
+        return self.index.bind(s if s is not None else self._data())
 
+    @profiling.timed("TasksTab.refresh_tree")
     def refresh_tree(self):
-        self.tree.delete(*self.tree.get_children())
-        s = self._data()
-        for t in s.get("tasks", []):
-            tid = f"t:{t['id']}"
-            self.tree.insert("", "end", iid=tid, text=t["title"], values=("", ""))
-            # subtasks
-            for sub in t.get("subtasks", []):
-                self.tree.insert(tid, "end",
-                                 iid=f"s:{t['id']}:{sub['id']}",
-                                 text=sub["title"],
-                                 values=(sub["weight"], "✓" if sub["done"] else ""))
-            # update progress bar for selected task
+        """Bring the tree in line with the tasks, touching only rows that changed."""
+        self._apply_rows(self._index().rows(self.loaded, self.expanded, self.extra))
         self.update_progress()
 
+    def _opened(self, is_open):
+        iid = self.tree.focus()
+        if not iid.startswith("t:"): return
+        tid = iid.split(":")[1]
+        if is_open: self.expanded.add(tid)
+        else: self.expanded.discard(tid)   # its subtask rows are dropped
+        self.refresh_tree()
+
+    def _scrolled(self, lo, hi):
+        self.sb.set(lo, hi)
+        # near the bottom (or everything fits): bring in the next page
+        if float(hi) > 0.9 and self.index.src is not None and self.loaded < len(self.index.src):
+            self.loaded += self.PAGE
+            defer(self, self.refresh_tree)
+
+    def _reveal(self, tid):
+        """Make sure task tid is loaded and open, and scroll to it."""
+        if not self.tree.exists(f"t:{tid}"):
+            self.extra.add(tid)   # past the loaded pages: add just its row
+        self.expanded.add(tid)
+        self.refresh_tree()
+        if self.tree.exists(f"t:{tid}"):
+            self.tree.item(f"t:{tid}", open=True)
+            self.tree.see(f"t:{tid}")
+
+    def _apply_rows(self, want):
+        tree, shown = self.tree, self.shown
+        keep = {iid for iid, *_ in want}
+        for iid in [i for i in shown if i not in keep]:
+            parent = shown.pop(iid)[0]
+            if parent not in shown and parent:   # went with its deleted parent
+                continue
+            tree.delete(iid)
+        order = {}
+        for iid, parent, text, values in want:
+            pos = order.setdefault(parent, [])
+            cur = shown.get(iid)
+            if cur is None:
+                tree.insert(parent, len(pos), iid=iid, text=text, values=values)
+            elif cur != (parent, text, values):
+                if cur[0] != parent:
+                    tree.move(iid, parent, len(pos))
+                tree.item(iid, text=text, values=values)
+            pos.append(iid)
+            shown[iid] = (parent, text, values)
+        # rows only reorder when another process rewrote the list
+        for parent, iids in order.items():
+            if self.order.get(parent) != iids and list(tree.get_children(parent)) != iids:
+                for i, iid in enumerate(iids):
+                    tree.move(iid, parent, i)
+        self.order = order
+
     def _selected_task(self):
         sel = self.tree.selection()
         if not sel: return None
         iid = sel[0]
-        if iid.startswith("t:"):
-            return iid.split(":")[1]
-        elif iid.startswith("s:"):
+        if iid.startswith(("t:", "s:", "p:")):
             return iid.split(":")[1]
         return None
 
@@ -235,11 +322,9 @@ class TasksTab(ttk.Frame):
     def add_task(self):
         title = simpledialog.askstring("New Task", "Task title:")
         if not title: return
-        s = self._data()
-        t_id = random.randint(1000, 999999)
-        s["tasks"].append({"id": t_id, "title": title, "subtasks": []})
-        self._save(s)
-        self.refresh_tree()
+        with transaction() as s:
+            t = self._index(s).add_task(title)
+        self._reveal(str(t["id"]))
 
     def add_subtask(self):
         task_id = self._selected_task()
@@ -250,17 +335,14 @@ class TasksTab(ttk.Frame):
         if not title: return
         weight = simpledialog.askinteger("Weight %", "Enter weight (0-100):", minvalue=0, maxvalue=100)
         if weight is None: return
-        s = self._data()
-        for t in s["tasks"]:
-            if str(t["id"]) == str(task_id):
-                sub_id = random.randint(1000, 999999)
-                t["subtasks"].append({"id": sub_id, "title": title, "weight": int(weight), "done": False})
-                # validate weights sum
-                total = sum(x["weight"] for x in t["subtasks"])
-                if total != 100:
-                    messagebox.showwarning("Weights", f"Current total weight = {total}%. Aim for 100%.")
-        self._save(s)
-        self.refresh_tree()
+        with transaction() as s:
+            idx = self._index(s)
+            idx.add_subtask(task_id, title, weight)
+            total = idx.total_weight(task_id) if idx.task(task_id) else 100
+        # validate weights sum (outside the transaction: don't hold the lock on a dialog)
+        if total != 100:
+            messagebox.showwarning("Weights", f"Current total weight = {total}%. Aim for 100%.")
+        self._reveal(task_id)
 
     def set_weight(self):
         if not self._selected_is_subtask():
@@ -270,13 +352,8 @@ class TasksTab(ttk.Frame):
         _, task_id, sub_id = sel.split(":")
         new_w = simpledialog.askinteger("Weight %", "Enter weight (0-100):", minvalue=0, maxvalue=100)
         if new_w is None: return
-        s = self._data()
-        for t in s["tasks"]:
-            if str(t["id"]) == task_id:
-                for sub in t["subtasks"]:
-                    if str(sub["id"]) == sub_id:
-                        sub["weight"] = int(new_w)
-        self._save(s)
+        with transaction() as s:
+            self._index(s).set_weight(task_id, sub_id, new_w)
         self.refresh_tree()
 
     def toggle_done(self):
@@ -285,35 +362,30 @@ class TasksTab(ttk.Frame):
             return
         sel = self.tree.selection()[0]
         _, task_id, sub_id = sel.split(":")
-        s = self._data()
-        for t in s["tasks"]:
-            if str(t["id"]) == task_id:
-                for sub in t["subtasks"]:
-                    if str(sub["id"]) == sub_id:
-                        sub["done"] = not sub["done"]
-                        if sub["done"]:
-                            # proportional reward
-                            c = int(sub["weight"] * REWARD_SUBTASK_COINS_PER_PCT)
-                            x = int(sub["weight"] * REWARD_SUBTASK_XP_PER_PCT)
-                            reward(c, x, 0)
-                            self.stats_refresh_cb()
-        self._save(s)
+        rewarded = False
+        with transaction() as s:
+            sub = self._index(s).toggle(task_id, sub_id)
+            if sub and sub["done"]:
+                # proportional reward, committed with the toggle
+                c = int(sub["weight"] * REWARD_SUBTASK_COINS_PER_PCT)
+                x = int(sub["weight"] * REWARD_SUBTASK_XP_PER_PCT)
+                reward(c, x, 0)
+                rewarded = True
+        if rewarded:
+            self.stats_refresh_cb()
         self.refresh_tree()
 
     def delete_item(self):
         sel = self.tree.selection()
-        if not sel: return
+        if not sel or sel[0].startswith("p:"): return
         iid = sel[0]
-        s = self._data()
-        if iid.startswith("t:"):
-            task_id = iid.split(":")[1]
-            s["tasks"] = [t for t in s["tasks"] if str(t["id"]) != task_id]
-        else:
-            _, task_id, sub_id = iid.split(":")
-            for t in s["tasks"]:
-                if str(t["id"]) == task_id:
-                    t["subtasks"] = [sub for sub in t["subtasks"] if str(sub["id"]) != sub_id]
-        self._save(s)
+        with transaction() as s:
+            idx = self._index(s)
+            if iid.startswith("t:"):
+                idx.delete_task(iid.split(":")[1])
+            else:
+                _, task_id, sub_id = iid.split(":")
+                idx.delete_subtask(task_id, sub_id)
         self.refresh_tree()
 
     def update_progress(self):
@@ -322,18 +394,13 @@ class TasksTab(ttk.Frame):
         if not sel:
             self.progress["value"] = 0
             return
-        iid = sel[0]
-        if iid.startswith("s:"):
-            _, task_id, _ = iid.split(":")
-        else:
-            task_id = iid.split(":")[1]
-        s = self._data()
-        for t in s["tasks"]:
-            if str(t["id"]) == task_id:
-                done_pct = sum(sub["weight"] for sub in t["subtasks"] if sub["done"])
-                self.progress["value"] = min(100, done_pct)
+        # from the cached per-task totals; no reload, no polling
+        self.progress["value"] = self.index.progress(sel[0].split(":")[1])
 
-        self.after(300, self.update_progress)
+    def on_state_changed(self):
+        """Another process (or tab) committed: re-sync if the tasks were reloaded."""
+        if self._data().get("tasks") is not self.index.src:
+            self.refresh_tree()
 
 # ---------- Calendar tab
 
@@ -358,10 +425,59 @@ class CalendarTab(ttk.Frame):
         self.lbl.pack(side="left", padx=8)
         ttk.Button(top, text=">", command=self.next_month).pack(side="left")
         ttk.Button(top, text="Add note to date…", command=self.add_note_prompt).pack(side="right")
+        ttk.Button(top, text="New event…", command=self.add_event).pack(side="right", padx=4)
 
         self.gridf = ttk.Frame(self); self.gridf.pack(padx=6, pady=6, fill="both", expand=True)
+        self._build_grid()
+        self.styles = {}        # color -> ttk style name, one per color ever used
+        self.by_month = {}      # "YYYY-MM" -> set of iso dates with a note
+        self.indexed = None     # the calendar dict by_month was built from
+        self.events = EventCalendar()
         self.draw()
 
+    def _build_grid(self):
+        """Header and 6x7 day buttons, created once and reused for every month."""
+        head = ttk.Frame(self.gridf); head.pack(fill="x")
+        for wd in ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]:
+            ttk.Label(head, text=wd, width=8, anchor="center").pack(side="left", expand=True)
+        self.rows, self.cells = [], []
+        for r in range(6):
+            row = ttk.Frame(self.gridf)
+            for c in range(7):
+                btn = ttk.Button(row, width=8, takefocus=False, command=lambda i=len(self.cells): self._click(i))
+                btn.pack(side="left", expand=True, padx=1, pady=1)
+                self.cells.append(btn)
+            self.rows.append(row)
+        self.shown_rows = 0
+        self.cell_days = [None] * 42
+        self.cell_look = [None] * 42   # (text, style, disabled) last applied
+
+    def _style_for(self, color):
+        name = self.styles.get(color)
+        if name is None:
+            name = self.styles[color] = f"C{len(self.styles)}.TButton"
+            ttk.Style().configure(name, foreground="black", background=color)
+        return name
+
+    def _month_notes(self, cal, year, month):
+        """Iso dates with a note in the given month, from a per-month index of cal."""
+        if cal is not self.indexed or sum(map(len, self.by_month.values())) != len(cal):
+            self.indexed, self.by_month = cal, {}
+            for iso in cal:
+                self.by_month.setdefault(iso[:7], set()).add(iso)
+        return self.by_month.get(f"{year:04d}-{month:02d}", ())
+
+    def _click(self, i):
+        day = self.cell_days[i]
+        if day is None: return
+        s = load()
+        if day.isoformat() in s.get("calendar", {}):
+            self.edit_note(day)
+        elif self.events.bind(s).on(day):
+            self.show_events(day)
+        else:
+            self.add_note(day)
+
     def prev_month(self):
         d = dt.date(self.year, self.month, 1) - dt.timedelta(days=1)
         self.year, self.month = d.year, d.month
@@ -373,44 +489,45 @@ class CalendarTab(ttk.Frame):
         self.year, self.month = d.year, d.month
         self.draw()
 
+    @profiling.timed("CalendarTab.draw")
     def draw(self):
-        for w in self.gridf.winfo_children(): w.destroy()
         self.lbl.config(text=f"{calendar.month_name[self.month]} {self.year}")
 
-        head = ttk.Frame(self.gridf); head.pack(fill="x")
-        for wd in ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]:
-            ttk.Label(head, text=wd, width=8, anchor="center").pack(side="left", expand=True)
-
         s = load()
-        cal = calendar.Calendar(firstweekday=0)  # Monday
-        for week in cal.monthdatescalendar(self.year, self.month):
-            row = ttk.Frame(self.gridf); row.pack(fill="x")
-            for day in week:
-                btn = ttk.Button(row, text=str(day.day), width=8)
-                btn.pack(side="left", expand=True, padx=1, pady=1)
-                iso = day.isoformat()
-                if iso in s.get("calendar", {}):
-                    color = s["calendar"][iso].get("color", "#cccccc")
-                    btn.config(style="")
-                    btn.configure(text=f"{day.day} •")
-                    btn["command"] = lambda d=day: self.edit_note(d)
-                    # quick color hint
-                    btn.configure(takefocus=False)
-                    btn.bind("<Expose>", lambda e, b=btn, c=color: b.configure()
-                             )
-                    btn.configure()
-                    btn.configure()
-                    btn.configure()
-                    # color via style
-                    style_name = f"Color.TButton.{iso}"
-                    style = ttk.Style()
-                    style.configure(style_name, foreground="black", background=color)
-                    btn.configure(style=style_name)
-                else:
-                    btn["command"] = lambda d=day: self.add_note(d)
-
-                if day.month != self.month:
-                    btn.state(["disabled"])
+        cal = s.get("calendar", {})
+        events = self.events.bind(s)
+        weeks = calendar.Calendar(firstweekday=0).monthdatescalendar(self.year, self.month)  # Monday
+        # the grid shows the month's weeks and the months around it may add a
+        # leading/trailing week, so look at all three in the indexes
+        noted, occurring = set(), {}
+        for y, m in {(weeks[0][0].year, weeks[0][0].month), (self.year, self.month),
+                     (weeks[-1][-1].year, weeks[-1][-1].month)}:
+            noted.update(self._month_notes(cal, y, m))
+            occurring.update(events.month(y, m))
+
+        if len(weeks) != self.shown_rows:
+            for row in self.rows[len(weeks):]: row.pack_forget()
+            for row in self.rows[self.shown_rows:len(weeks)]: row.pack(fill="x")
+            self.shown_rows = len(weeks)
+
+        for i, btn in enumerate(self.cells[:len(weeks) * 7]):
+            day = weeks[i // 7][i % 7]
+            self.cell_days[i] = day
+            iso = day.isoformat()
+            if iso in noted:
+                look = (f"{day.day} •", self._style_for(cal[iso].get("color", "#cccccc")), day.month != self.month)
+            elif iso in occurring:
+                evs = occurring[iso]
+                look = (f"{day.day} " + "•" * min(3, len(evs)), self._style_for(evs[0].get("color", "#cccccc")),
+                        day.month != self.month)
+            else:
+                look = (str(day.day), "TButton", day.month != self.month)
+            if look != self.cell_look[i]:
+                self.cell_look[i] = look
+                btn.configure(text=look[0], style=look[1])
+                btn.state(["disabled"] if look[2] else ["!disabled"])
+        for i in range(len(weeks) * 7, 42):
+            self.cell_days[i] = None
 
     def add_note_prompt(self):
         d = simpledialog.askstring("Date (YYYY-MM-DD)", "Enter date:")
@@ -430,27 +547,174 @@ class CalendarTab(ttk.Frame):
                                             initialvalue="None")
         color = self.COLORS.get(color_name or "None", "#cccccc")
         note = simpledialog.askstring("Details", "Optional note:")
-        s = load()
-        s.setdefault("calendar", {})
-        s["calendar"][date_obj.isoformat()] = {"title": title, "color": color, "note": note or ""}
-        save(s)
+        with transaction() as s:
+            s.setdefault("calendar", {})
+            s["calendar"][date_obj.isoformat()] = {"title": title, "color": color, "note": note or ""}
         self.draw()
 
     def edit_note(self, date_obj):
-        s = load()
         key = date_obj.isoformat()
-        data = s["calendar"].get(key, {})
+        data = load()["calendar"].get(key, {})
         title = simpledialog.askstring("Edit Title", "Title:", initialvalue=data.get("title",""))
         if title is None: return
         _, color_hex = colorchooser.askcolor(title="Pick color", color=data.get("color","#cccccc"))
         note = simpledialog.askstring("Edit Note", "Note:", initialvalue=data.get("note",""))
-        s["calendar"][key] = {"title": title, "color": color_hex or "#cccccc", "note": note or ""}
-        save(s)
+        with transaction() as s:
+            s["calendar"][key] = {"title": title, "color": color_hex or "#cccccc", "note": note or ""}
+        self.draw()
+
+    def add_event(self):
+        """Multi-day and/or repeating event, stored once however long it runs.
+        Cancelling any of the prompts abandons the event."""
+        title = simpledialog.askstring("New Event", "Title:")
+        if not title: return
+        start = simpledialog.askstring("Start", "Start date (YYYY-MM-DD):",
+                                       initialvalue=dt.date.today().isoformat())
+        if start is None: return
+        end = simpledialog.askstring("End", "Last day (YYYY-MM-DD, blank for one day):")
+        if end is None: return
+        repeat = simpledialog.askstring("Repeat", f"Repeat {[r for r in REPEATS if r]} (blank for never):")
+        if repeat is None: return
+        repeat = repeat.strip().lower() or None
+        every, until = 1, ""
+        if repeat:
+            every = simpledialog.askinteger("Every", f"Every how many ({repeat})?", initialvalue=1, minvalue=1)
+            if every is None: return
+            until = simpledialog.askstring("Until", "Repeat until (YYYY-MM-DD, blank for forever):")
+            if until is None: return
+        color_name = simpledialog.askstring("Color", f"Pick category {list(self.COLORS.keys())}:",
+                                            initialvalue="None")
+        if color_name is None: return
+        color = self.COLORS.get(color_name, "#cccccc")
+        try:
+            start = dt.date.fromisoformat(start.strip())
+            end = dt.date.fromisoformat(end.strip()) if end.strip() else None
+            until = dt.date.fromisoformat(until.strip()) if until.strip() else None
+            with transaction() as s:
+                new_event(s, title, start, end, repeat, every, until, color)
+        except ValueError as e:
+            messagebox.showerror("Invalid", str(e) or "Use YYYY-MM-DD.")
+            return
+        self.draw()
+
+    def show_events(self, date_obj):
+        evs = self.events.on(date_obj)
+        lines = [f"{i+1}. {ev['title']}" + (f" (repeats {ev['repeat']})" if ev.get("repeat") else "")
+                 for i, ev in enumerate(evs)]
+        pick = simpledialog.askinteger("Events on " + date_obj.isoformat(),
+                                       "\n".join(lines) + "\n\nNumber to delete (all occurrences), or Cancel:",
+                                       minvalue=1, maxvalue=len(evs))
+        if pick is None: return
+        with transaction() as s:
+            delete_event(s, evs[pick - 1]["id"])
         self.draw()
 
 # ---------- Reports tab
 
+def bucket_days(days, size):
+    """[(label, focus_s, break_s)] from daily_between() rows, summed per "day",
+    "week" (ISO, labelled YYYY-Www) or "month" (YYYY-MM)."""
+    out = []
+    for k, d in days:
+        if size == "week":
+            y, w, _ = dt.date.fromisoformat(k).isocalendar()
+            label = f"{y}-W{w:02d}"
+        elif size == "month":
+            label = k[:7]
+        else:
+            label = k
+        foc, brk = d["FOCUS"], d["SHORT"] + d["LONG"]
+        if out and out[-1][0] == label:
+            out[-1] = (label, out[-1][1] + foc, out[-1][2] + brk)
+        else:
+            out.append((label, foc, brk))
+    return out
+
+class DayChart(ttk.Frame):
+    """Focus/break bars, one row per bucket, on a single scrollable Canvas.
+
+    The canvas scrolls over the full virtual height, but items exist only for
+    a pool of row slots covering the view: row r always lives in slot
+    r % len(pool), so scrolling re-points just the slots that came into view.
+    Drawing costs the same for a week as for ten years."""
+    ROW_H = 22
+    LABEL_X, FOCUS_X, BREAK_X = 4, 100, 440
+    FOCUS_W, BREAK_W = 240, 160
+    TROUGH, FOCUS_FILL, BREAK_FILL = "#e4e4e4", "#4a90d9", "#7bbf7a"
+
+    def __init__(self, master, height=220):
+        super().__init__(master)
+        self.canvas = tk.Canvas(self, height=height, highlightthickness=0, background="white")
+        sb = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=lambda lo, hi: (sb.set(lo, hi), self._fill()))
+        sb.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.rows, self.slots = [], []
+        self.scale = (1, 1)
+        self.canvas.bind("<Configure>", lambda e: self._fill())
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def set_rows(self, rows):
+        """rows: [(label, focus_seconds, break_seconds)]."""
+        self.rows = rows
+        # day bars keep the old fixed 4 h / 160 min scale; wider buckets stretch it
+        self.scale = (max([240] + [f // 60 for _, f, _ in rows]), max([160] + [b // 60 for _, _, b in rows]))
+        for slot in self.slots:
+            slot["row"] = None
+        self.canvas.configure(scrollregion=(0, 0, 1, max(1, len(rows) * self.ROW_H)),
+                              yscrollincrement=self.ROW_H)
+        self.canvas.yview_moveto(0)
+        self._fill()
+
+    def _slot(self):
+        c = self.canvas
+        mk = lambda **kw: c.create_text(0, 0, anchor="w", state="hidden", **kw)
+        box = lambda fill: c.create_rectangle(0, 0, 0, 0, fill=fill, width=0, state="hidden")
+        return {"row": None, "label": mk(), "ft": box(self.TROUGH), "fb": box(self.FOCUS_FILL), "fl": mk(),
+                "bt": box(self.TROUGH), "bb": box(self.BREAK_FILL), "bl": mk()}
+
+    def _fill(self):
+        c = self.canvas
+        n = c.winfo_height() // self.ROW_H + 2
+        while len(self.slots) < n:
+            self.slots.append(self._slot())
+        n = len(self.slots)
+        first = int(c.canvasy(0)) // self.ROW_H
+        for r in range(first, first + n):
+            slot = self.slots[r % n]
+            if slot["row"] != r:
+                self._place(slot, r)
+
+    def _place(self, slot, r):
+        c = self.canvas
+        slot["row"] = r
+        items = [slot[k] for k in ("label", "ft", "fb", "fl", "bt", "bb", "bl")]
+        if not 0 <= r < len(self.rows):
+            for i in items: c.itemconfigure(i, state="hidden")
+            return
+        label, foc, brk = self.rows[r]
+        foc, brk = foc // 60, brk // 60
+        y0 = r * self.ROW_H + 4
+        y1, ym = y0 + self.ROW_H - 8, r * self.ROW_H + self.ROW_H // 2
+        fw = self.FOCUS_W * foc // self.scale[0]
+        bw = self.BREAK_W * brk // self.scale[1]
+        c.coords(slot["label"], self.LABEL_X, ym)
+        c.coords(slot["ft"], self.FOCUS_X, y0, self.FOCUS_X + self.FOCUS_W, y1)
+        c.coords(slot["fb"], self.FOCUS_X, y0, self.FOCUS_X + fw, y1)
+        c.coords(slot["fl"], self.FOCUS_X + self.FOCUS_W + 8, ym)
+        c.coords(slot["bt"], self.BREAK_X, y0, self.BREAK_X + self.BREAK_W, y1)
+        c.coords(slot["bb"], self.BREAK_X, y0, self.BREAK_X + bw, y1)
+        c.coords(slot["bl"], self.BREAK_X + self.BREAK_W + 8, ym)
+        c.itemconfigure(slot["label"], text=label)
+        c.itemconfigure(slot["fl"], text=f"{foc}m focus")
+        c.itemconfigure(slot["bl"], text=f"{brk}m break")
+        for i in items: c.itemconfigure(i, state="normal")
+
 class ReportsTab(ttk.Frame):
+    GROUPS = ("Auto", "Day", "Week", "Month")
+
     def __init__(self, master):
         super().__init__(master)
         top = ttk.Frame(self); top.pack(fill="x", pady=4)
@@ -458,48 +722,46 @@ class ReportsTab(ttk.Frame):
         ttk.Button(top, text="Today", command=self.show_today).pack(side="left", padx=4)
         ttk.Button(top, text="This Week", command=self.show_week).pack(side="left", padx=4)
         ttk.Button(top, text="Custom…", command=self.show_custom).pack(side="left", padx=4)
+        self.group = tk.StringVar(value="Auto")
+        box = ttk.Combobox(top, textvariable=self.group, values=self.GROUPS, width=7, state="readonly")
+        box.pack(side="right", padx=6)
+        box.bind("<<ComboboxSelected>>", lambda e: self._chart())
+        ttk.Label(top, text="Group by").pack(side="right")
 
         self.info = tk.Text(self, height=10)
         self.info.pack(fill="x", padx=6, pady=6)
 
-        self.daily_frame = ttk.Frame(self); self.daily_frame.pack(fill="x", padx=6, pady=(0,6))
+        self.chart = DayChart(self)
+        self.chart.pack(fill="both", expand=True, padx=6, pady=(0,6))
+        self.days, self.span = [], 1
         self.show_week()  # default
 
+    @profiling.timed("ReportsTab._range")
     def _range(self, start_dt, end_dt):
-        # aggregate by day
-        s = load()
-        sessions = s.get("sessions", [])
-        by_day = {}
-        total_focus = total_break = 0
-        for sess in sessions:
-            st = dt.datetime.fromtimestamp(sess["start_ts"])
-            if not (start_dt <= st <= end_dt): continue
-            dur = max(0, sess["end_ts"] - sess["start_ts"])
-            day_key = st.date().isoformat()
-            by_day.setdefault(day_key, {"FOCUS":0,"SHORT":0,"LONG":0})
-            by_day[day_key][sess["type"]] += dur
-            if sess["type"] == "FOCUS": total_focus += dur
-            else: total_break += dur
+        # per-day rollups: O(days in range), not O(all sessions ever)
+        self.days = daily_between(start_dt.date(), end_dt.date())
+        self.span = (end_dt.date() - start_dt.date()).days + 1
+        total_focus = sum(d["FOCUS"] for _, d in self.days)
+        total_break = sum(d["SHORT"] + d["LONG"] for _, d in self.days)
 
         self.info.delete("1.0", "end")
         self.info.insert("end", f"From {start_dt.date()} to {end_dt.date()}\n")
         self.info.insert("end", f"Total Focus: {total_focus//60} min\n")
         self.info.insert("end", f"Total Breaks: {total_break//60} min\n")
         self.info.insert("end", f"Sessions completed: {load()['sessions_completed']}\n")
-
-        for w in self.daily_frame.winfo_children(): w.destroy()
-        # simple per-day bars
-        for k in sorted(by_day.keys()):
-            row = ttk.Frame(self.daily_frame); row.pack(fill="x", pady=2)
-            ttk.Label(row, text=k, width=12).pack(side="left")
-            foc = by_day[k]["FOCUS"]//60
-            brk = (by_day[k]["SHORT"]+by_day[k]["LONG"])//60
-            pb1 = ttk.Progressbar(row, length=240, maximum=240, value=min(240, foc))
-            pb1.pack(side="left", padx=4)
-            ttk.Label(row, text=f"{foc}m focus").pack(side="left", padx=6)
-            pb2 = ttk.Progressbar(row, length=160, maximum=160, value=min(160, brk))
-            pb2.pack(side="left", padx=4)
-            ttk.Label(row, text=f"{brk}m break").pack(side="left", padx=6)
+        rep = analytics.summary(start_dt.date(), end_dt.date())
+        n, a, z = rep["streak"]
+        self.info.insert("end", f"Longest focus streak: {n} day(s)" + (f" ({a} to {z})" if n else "") + "\n")
+        h, secs = rep["peak_hour"]
+        self.info.insert("end", f"Peak focus hour: {h:02d}:00 ({secs//60} min)\n")
+        self.info.insert("end", f"{rep['window']}-day average focus: {rep['rolling_avg']/60:.0f} min/day\n")
+        self._chart()
+
+    def _chart(self):
+        size = self.group.get().lower()
+        if size == "auto":
+            size = "day" if self.span <= 62 else "week" if self.span <= 730 else "month"
+        self.chart.set_rows(bucket_days(self.days, size))
 
     def show_today(self):
         now = dt.datetime.now()
@@ -526,33 +788,173 @@ class ReportsTab(ttk.Frame):
 # ---------- Stats bar & game launcher
 
 class StatsBar(ttk.Frame):
-    def __init__(self, master):
+    WATCH_S = 5.0          # storage-signature poll for writers without a hub connection
+    POLL_MS = 100          # hand-off from hub threads while another process is up
+    IDLE_POLL_MS = 5000    # ... and while none is (only watch() can fire then)
+
+    def __init__(self, master, state=None):
         super().__init__(master)
         self.pack(fill="x")
         self.coins_lbl = ttk.Label(self, text="Coins: 0"); self.coins_lbl.pack(side="left", padx=8)
         self.xp_lbl = ttk.Label(self, text="XP: 0"); self.xp_lbl.pack(side="left", padx=8)
         self.sess_lbl = ttk.Label(self, text="Sessions: 0"); self.sess_lbl.pack(side="left", padx=8)
         ttk.Button(self, text="Open Reward World", command=self.open_game).pack(side="right", padx=6)
-        self.refresh()
-        self.after(3000, self._tick)
-
-    def _tick(self):
-        self.refresh()
-        self.after(3000, self._tick)
-
-    def refresh(self):
-        s = load()
+        self.refresh(state)
+        # the hub wakes us when either process commits. Our own commits
+        # arrive on the Tk thread and are passed on at once; the others come
+        # from hub threads, where Tk must not be touched, so they set a flag
+        # that _poll picks up. Tk has no portable cross-thread wakeup (a
+        # file handler would do on POSIX, not on Windows), hence the poll:
+        # quick only while Reward World runs or another process is connected,
+        # slow otherwise,
+        # and checked at once when the window is mapped or focused
+        self.game = None   # the Reward World process, started once
+        self.changed = threading.Event()
+        self.tk_thread = threading.current_thread()
+        self.hub = notify.Hub()
+        self.hub.watch(self.WATCH_S)
+        self.hub.subscribe(self._hub_changed)
+        self.bind("<<StateChanged>>", lambda e: defer(self, self.refresh))
+        self._poll_id = self.after(self.POLL_MS, self._poll)
+        for seq in ("<Map>", "<FocusIn>"):
+            self.winfo_toplevel().bind(seq, lambda e: self._poll(), add="+")
+
+    def _hub_changed(self, version):
+        if threading.current_thread() is self.tk_thread:
+            self.event_generate("<<StateChanged>>", when="tail")
+        else:
+            self.changed.set()
+
+    def _poll(self):
+        if self._poll_id is None:
+            return   # closed
+        self.after_cancel(self._poll_id)
+        if self.changed.is_set():
+            self.changed.clear()
+            self.event_generate("<<StateChanged>>", when="tail")
+        busy = self.hub.peers or (self.game is not None and self.game.poll() is None)
+        ms = self.POLL_MS if busy else self.IDLE_POLL_MS
+        self._poll_id = self.after(ms, self._poll)
+
+    @profiling.timed("StatsBar.refresh")
+    def refresh(self, s=None):
+        s = s or load()
         self.coins_lbl.config(text=f"Coins: {s['coins']}")
         self.xp_lbl.config(text=f"XP: {s['xp']}")
         self.sess_lbl.config(text=f"Sessions: {s['sessions_completed']}")
 
     def open_game(self):
+        # one Reward World per app: show/raise it if it is up, otherwise start
+        # it; a "show" sent before it connects is delivered when it does
+        if not self.hub.command("show"):
+            self.start_game()
+
+    def start_game(self, hidden=False):
+        """Spawn Reward World unless it is already running (or starting)."""
+        if self.game is not None and self.game.poll() is None:
+            return
         here = os.path.dirname(__file__)
         game = os.path.join(here, "pg_game.py")
-        subprocess.Popen([sys.executable, game])
+        env = dict(os.environ, **self.hub.env())
+        self.game = subprocess.Popen([sys.executable, game] + (["--hidden"] if hidden else []), env=env)
+        self._poll()   # to the quick interval before it connects
+
+    def hide_game(self):
+        self.hub.command("hide")
+
+    def close_game(self):
+        if self.game is not None and self.game.poll() is None:
+            self.hub.command("quit")
+        self.after_cancel(self._poll_id)
+        self._poll_id = None
+        self.hub.close()
+
+# ---------- Diagnostics tab (Ctrl+Shift+D)
+
+class DiagnosticsTab(ttk.Frame):
+    """Live call/latency/IO metrics (FOCUSFORGE_PROFILE=1) and cProfile captures."""
+    COLS = ("calls", "mean", "p50", "p95", "max", "hist")
+
+    def __init__(self, master):
+        super().__init__(master)
+        top = ttk.Frame(self); top.pack(fill="x", pady=4)
+        ttk.Label(top, text="Diagnostics", font=("Segoe UI", 12, "bold")).pack(side="left", padx=6)
+        ttk.Button(top, text="Reset", command=self.reset).pack(side="right", padx=4)
+        ttk.Button(top, text="Profile", command=self.profile).pack(side="right", padx=4)
+        self.secs = tk.IntVar(value=10)
+        ttk.Spinbox(top, from_=1, to=300, width=4, textvariable=self.secs).pack(side="right")
+        ttk.Label(top, text="cProfile next N s:").pack(side="right", padx=4)
+        if not profiling.ENABLED:
+            ttk.Label(self, text="Call metrics are off; start the app with FOCUSFORGE_PROFILE=1.").pack(anchor="w", padx=6)
+
+        self.table = ttk.Treeview(self, columns=self.COLS, show="tree headings", height=12)
+        self.table.heading("#0", text="Function")
+        self.table.column("#0", width=200)
+        for c, w in zip(self.COLS, (60, 70, 60, 60, 70, 240)):
+            self.table.heading(c, text=c if c in ("calls", "hist") else c + " ms")
+            self.table.column(c, width=w, anchor="e" if c != "hist" else "w")
+        self.table.pack(fill="both", expand=True, padx=6)
+        self.info = ttk.Label(self, text="", justify="left")
+        self.info.pack(fill="x", padx=6, pady=6)
+        self._job = None
+        # only tick while the tab is on screen
+        self.bind("<Map>", lambda e: self.tick())
+        self.bind("<Unmap>", lambda e: self._stop())
+
+    def _stop(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+
+    def tick(self):
+        self._stop()
+        snap = profiling.snapshot()
+        for name, m in snap["calls"].items():
+            values = (m["calls"], f"{m['mean_ms']:.2f}", f"≤{m['p50_ms']:g}", f"≤{m['p95_ms']:g}",
+                      f"{m['max_ms']:.1f}", " ".join(map(str, m["hist"])))
+            if self.table.exists(name):
+                self.table.item(name, values=values)
+            else:
+                self.table.insert("", "end", iid=name, text=name, values=values)
+        io = "   ".join(f"{k}: {v['read']:,} B read / {v['written']:,} B written" for k, v in snap["io"].items())
+        cache = shared.cache_stats() if shared.BACKEND == "json" else {}
+        w = shared.write_stats()
+        self.info.config(text=(f"I/O  {io or '-'}\n"
+                               f"histogram buckets (ms): {' '.join(f'≤{b:g}' for b in profiling.BUCKETS_MS)} >\n"
+                               f"load cache: {cache}   refresh callbacks: {REFRESH_STATS}\n"
+                               f"writes ({w['durability']}): {w['writes']} ({w['merged']} merged), "
+                               f"{w['pending']} pending, last {w['last_ms']:.1f} ms, mean {w['mean_ms']:.1f} ms, "
+                               f"max {w['max_ms']:.1f} ms" + (f", error: {w['error']}" if w["error"] else "")))
+        self._job = self.after(1000, self.tick)
+
+    def reset(self):
+        profiling.reset()
+        self.table.delete(*self.table.get_children())
+        self.tick()
+
+    def profile(self):
+        path = os.path.abspath(f"focusforge-{dt.datetime.now():%Y%m%d-%H%M%S}.prof")
+        secs = max(1, self.secs.get())
+        if profiling.capture(secs, path, self.after,
+                             on_done=lambda p: messagebox.showinfo("Profile saved", f"{p}\n\npython -m pstats {p}")):
+            self.info.config(text=f"Profiling the next {secs} s…")
+        else:
+            messagebox.showinfo("Profiling", "A capture is already running.")
 
 # ---------- App shell
 
+class LazyTab(ttk.Frame):
+    """Notebook page whose content is built the first time it is shown."""
+    def __init__(self, master, factory):
+        super().__init__(master)
+        self.factory, self.content = factory, None
+
+    def build(self, state=None):
+        if self.content is None:
+            self.content = self.factory(self, state)
+            self.content.pack(fill="both", expand=True)
+        return self.content
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -561,21 +963,88 @@ class App(tk.Tk):
         self.style = ttk.Style(self)
         self.style.theme_use("default")
 
-        self.stats = StatsBar(self)
+        state = load()   # the one load at startup, shared by what is built now
+        # UI edits update memory and are written behind (see shared.set_durability)
+        shared.set_durability(state["options"].get("durability", "balanced"))
+        self.stats = StatsBar(self, state)
 
         nb = ttk.Notebook(self); nb.pack(fill="both", expand=True)
-        self.tab_timer = PomodoroTab(nb, stats_refresh_cb=self.stats.refresh)
-        self.tab_tasks = TasksTab(nb, stats_refresh_cb=self.stats.refresh)
-        self.tab_calendar = CalendarTab(nb)
-        self.tab_reports = ReportsTab(nb)
-
-        nb.add(self.tab_timer, text="Timer")
-        nb.add(self.tab_tasks, text="Tasks")
-        nb.add(self.tab_calendar, text="Calendar")
-        nb.add(self.tab_reports, text="Reports")
+        self.pages = {}
+        for name, text, factory in (
+                ("timer", "Timer", lambda m, s: PomodoroTab(m, stats_refresh_cb=self.stats.refresh, state=s)),
+                ("tasks", "Tasks", lambda m, s: TasksTab(m, stats_refresh_cb=self.stats.refresh)),
+                ("calendar", "Calendar", lambda m, s: CalendarTab(m)),
+                ("reports", "Reports", lambda m, s: ReportsTab(m))):
+            self.pages[name] = LazyTab(nb, factory)
+            nb.add(self.pages[name], text=text)
+        nb.bind("<<NotebookTabChanged>>", lambda e: self._show(nb.select()))
+        self._show(nb.select(), state)
+
+        self.stats.bind("<<StateChanged>>", lambda e: self._state_changed(), add="+")
+
+        # hidden until asked for; created on first use
+        self.nb, self.tab_diag = nb, None
+        self.bind_all("<Control-Shift-D>", lambda e: self.toggle_diagnostics())
+
+        if state["options"].get("prewarm_world", False):
+            # after the first paint, so it doesn't compete with our own startup
+            self.after(500, lambda: self.stats.start_game(hidden=True))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # built tabs (None until first shown)
+    tab_timer = property(lambda self: self.pages["timer"].content)
+    tab_tasks = property(lambda self: self.pages["tasks"].content)
+    tab_calendar = property(lambda self: self.pages["calendar"].content)
+    tab_reports = property(lambda self: self.pages["reports"].content)
+
+    def _show(self, page, state=None):
+        page = self.nametowidget(page)
+        if isinstance(page, LazyTab):
+            page.build(state)
+
+    def _state_changed(self):
+        if self.tab_tasks is not None:
+            defer(self.tab_tasks, self.tab_tasks.on_state_changed)
+
+    def on_close(self):
+        self.stats.close_game()
+        audio.stop()
+        shared.flush()
+        self.destroy()
+
+    def toggle_diagnostics(self):
+        if self.tab_diag is None:
+            self.tab_diag = DiagnosticsTab(self.nb)
+            self.nb.add(self.tab_diag, text="Diagnostics")
+        elif self.nb.tab(self.tab_diag, "state") == "hidden":
+            self.nb.add(self.tab_diag)
+        else:
+            self.nb.hide(self.tab_diag)
+            return
+        self.nb.select(self.tab_diag)
+
+def measure_startup(app, t_main):
+    """--startup-time: print import / build / first-paint times and exit."""
+    t_built = time.perf_counter()
+    def painted(e):
+        if e.widget is not app: return
+        app.unbind("<Expose>")
+        def done():
+            t = time.perf_counter()
+            cache = shared.cache_stats() if shared.BACKEND == "json" else {}
+            print(f"imports {(t_main - _T0)*1000:.0f} ms, App() {(t_built - t_main)*1000:.0f} ms, "
+                  f"first paint {(t - _T0)*1000:.0f} ms after import "
+                  f"(data.json parses: {cache.get('misses', '?')}, cached loads: {cache.get('hits', '?')})")
+            app.destroy()
+        app.after_idle(done)
+    app.bind("<Expose>", painted)
 
 def main():
-    App().mainloop()
+    t_main = time.perf_counter()
+    app = App()
+    if "--startup-time" in sys.argv:
+        measure_startup(app, t_main)
+    app.mainloop()
 
 if __name__ == "__main__":
     main()